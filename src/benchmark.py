@@ -0,0 +1,265 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This script times the hot paths of the recommender and writes the timings
+as JSON, so that runs on different commits can be compared:
+1. load: Recommender() parsing the ratings and movies files
+2. similarity: each of the six similarity functions on a sample of user pairs,
+   and the vectorized versions on a block of users
+3. neighbourhood: getNeighbourhood() for a sample of users
+4. prediction: getPrediction() for a sample of (user, movie) pairs
+5. recommendations: getRecommendations() for a few users
+6. testFromFile: predicting a whole test file
+7. evaluate: Evaluate.evaluate() on a 1% hold-out
+
+Every stage is run once cold (its first run, which builds whatever indexes it
+needs) and then --repeat more times; the best, median and mean of those runs
+are reported. Datasets are the bundled data files and any number of
+synthetic ones, --synthetic USERSxITEMS@DENSITY, drawn with a fixed seed.
+
+--compare reads the JSON of an earlier run and reports every stage whose
+median got slower by more than --tolerance, exiting with status 1 if any did.
+
+usage: python benchmark.py [--synthetic 2000x1000@0.02] [--backend dict sparse] [--output results.json]
+'''
+
+from __future__ import division, print_function
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import numpy
+import scipy
+import classes.evaluate
+import classes.recommender
+import functions.similarity
+import functions.synthetic
+
+
+# the stages in the order they are run
+STAGES = ('load', 'similarity', 'neighbourhood', 'prediction', 'recommendations', 'testFromFile', 'evaluate')
+
+
+
+'''measure() function'''
+def measure(function, repeat=3, calls=1):
+    ''' runs function once cold and repeat more times, returns the timings in seconds'''
+    ''' calls is how many operations one run of function performs'''
+    start = timeit.default_timer()
+    function()
+    cold = timeit.default_timer() - start
+    
+    times = []
+    for run in range(repeat):
+        start = timeit.default_timer()
+        function()
+        times.append(timeit.default_timer() - start)
+    times = numpy.array(times or [cold])
+    return {'calls': calls, 'repeat': repeat, 'cold': cold, 'best': float(times.min()),
+            'median': float(numpy.median(times)), 'mean': float(times.mean()),
+            'perCall': float(numpy.median(times)) / max(calls, 1)}
+
+
+
+'''makeSynthetic() function'''
+def makeSynthetic(spec, directory, numTests, seed):
+    ''' writes the synthetic dataset of spec "USERSxITEMS@DENSITY" to directory'''
+    ''' returns the dataset description run() takes'''
+    try:
+        (size, density) = spec.split('@')
+        (numUsers, numItems) = [int(count) for count in size.lower().split('x')]
+        density = float(density)
+    except ValueError:
+        raise ValueError("synthetic dataset must look like USERSxITEMS@DENSITY: %r" % (spec,))
+    
+    path = os.path.join(directory, spec.replace('@', '_'))
+    os.mkdir(path)
+    (users, movies, ratings) = functions.synthetic.generate_ratings(numUsers, numItems, density, seed)
+    dataset = {'name': 'synthetic ' + spec, 'ratings': os.path.join(path, 'ratings.dat'),
+               'movies': os.path.join(path, 'movies.dat'), 'test': os.path.join(path, 'testdata.dat')}
+    functions.synthetic.write_ratings(dataset['ratings'], users, movies, ratings)
+    functions.synthetic.write_movies(dataset['movies'], numItems)
+    functions.synthetic.write_tests(dataset['test'], numUsers, numItems, numTests, seed)
+    return dataset
+
+
+
+'''run() function'''
+def run(dataset, backend, args, directory):
+    ''' times the stages of args.stages on dataset with backend, returns {stage: timings}'''
+    results = {}
+    random = numpy.random.RandomState(args.seed)
+    similarity = getattr(functions.similarity, args.similarity)
+    
+    def log(stage):
+        print("%s, %s: %s" % (dataset['name'], backend, stage), file=sys.stderr)
+    
+    # always loaded: every other stage needs the recommender
+    log('load')
+    holder = {}
+    def load():
+        holder['rec'] = classes.recommender.Recommender(dataset['ratings'], dataset['movies'], backend=backend)
+    timings = measure(load, args.repeat if 'load' in args.stages else 0)
+    if 'load' in args.stages:
+        results['load'] = timings
+    rec = holder['rec']
+    matrix = rec.getMatrix()
+    users = sorted(matrix.users)
+    tests = [tuple(line.strip().split('\t')) for line in open(dataset['test']) if line.strip()]
+    
+    if 'similarity' in args.stages:
+        log('similarity')
+        stats = rec.getStats()
+        chosen = random.randint(0, len(users), size=(args.pairs, 2))
+        pairs = [(users[first], users[second]) for (first, second) in chosen.tolist()]
+        for function in functions.similarity.SIMILARITIES:
+            def pairwise():
+                for (person1, person2) in pairs:
+                    function(rec.ratings, person1, person2, stats)
+            results['similarity/' + function.__name__] = measure(pairwise, args.repeat, len(pairs))
+        
+        # the vectorized versions score a block of users against every user
+        rows = numpy.sort(random.choice(len(users), min(args.block, len(users)), replace=False))
+        for function in sorted(set(functions.similarity.MATRIX_SIMILARITIES.values()), key=lambda f: f.__name__):
+            results['similarity/' + function.__name__] = measure(lambda: function(matrix, rows, stats),
+                                                                 args.repeat, len(rows))
+    
+    sample = [users[position] for position in random.choice(len(users), min(args.users, len(users)),
+                                                            replace=False).tolist()]
+    if 'neighbourhood' in args.stages:
+        log('neighbourhood')
+        def neighbourhoods():
+            for person in sample:
+                rec.getNeighbourhood(person, similarity, args.n)
+        results['neighbourhood'] = measure(neighbourhoods, args.repeat, len(sample))
+    
+    if 'prediction' in args.stages:
+        log('prediction')
+        chosen = [tests[position] for position in random.randint(0, len(tests), size=args.predictions).tolist()]
+        def predictions():
+            for (person, movie) in chosen:
+                rec.getPrediction(person, movie, similarity, args.n)
+        results['prediction'] = measure(predictions, args.repeat, len(chosen))
+    
+    if 'recommendations' in args.stages:
+        log('recommendations')
+        def recommendations():
+            for person in sample[:args.recommendations]:
+                rec.getRecommendations(person, similarity)
+        results['recommendations'] = measure(recommendations, args.repeat, min(args.recommendations, len(sample)))
+    
+    if 'testFromFile' in args.stages:
+        log('testFromFile')
+        predictionsFile = os.path.join(directory, 'predictions.dat')
+        results['testFromFile'] = measure(lambda: rec.testFromFile(predictionsFile, dataset['test']),
+                                          args.repeat, len(tests))
+    
+    if 'evaluate' in args.stages:
+        log('evaluate')
+        def evaluate():
+            classes.evaluate.Evaluate(rec, seed=args.seed).evaluate(percentage=args.percentage)
+        results['evaluate'] = measure(evaluate, args.repeat, int(numpy.ceil(rec.getNumRatings() * args.percentage)))
+    
+    return {'dataset': dataset['name'], 'backend': backend, 'users': matrix.getNumUsers(),
+            'items': matrix.getNumItems(), 'ratings': matrix.getNumRatings(), 'stages': results}
+
+
+
+'''describe() function'''
+def describe(args):
+    ''' returns what the results were measured on: commit, versions, machine and arguments'''
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=open(os.devnull, 'w')).strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'numpy': numpy.__version__, 'scipy': scipy.__version__, 'platform': platform.platform(),
+            'processor': platform.processor(), 'arguments': vars(args)}
+
+
+
+'''compare() function'''
+def compare(results, baseline, tolerance):
+    ''' returns a line for every stage of results whose median is more than tolerance'''
+    ''' (a fraction) slower than in the baseline results'''
+    before = dict(((run['dataset'], run['backend'], stage), timings['median'])
+                  for run in baseline['runs'] for (stage, timings) in run['stages'].items())
+    slower = []
+    for run in results['runs']:
+        for (stage, timings) in sorted(run['stages'].items()):
+            key = (run['dataset'], run['backend'], stage)
+            if key in before and timings['median'] > before[key] * (1 + tolerance):
+                slower.append("%s, %s, %s: %.4fs -> %.4fs (%+.0f%%)" %
+                              (key + (before[key], timings['median'], 100 * (timings['median'] / before[key] - 1))))
+    return slower
+
+
+
+'''main() function'''
+def main():
+    parser = argparse.ArgumentParser(description="times the hot paths of the recommender")
+    parser.add_argument('--ratings', default="../data/ratings.dat")
+    parser.add_argument('--movies', default="../data/movies.dat")
+    parser.add_argument('--test', default="../data/testdata.dat")
+    parser.add_argument('--no-bundled', action='store_true', help="skip the bundled data files")
+    parser.add_argument('--synthetic', action='append', default=[], metavar='USERSxITEMS@DENSITY',
+                        help="also time a synthetic dataset, may be repeated")
+    parser.add_argument('--backend', nargs='+', default=['sparse'], choices=('dict', 'sparse'))
+    parser.add_argument('--stages', nargs='+', default=list(STAGES), choices=STAGES)
+    parser.add_argument('--similarity', default='weighted_similarity', help="a function of functions.similarity")
+    parser.add_argument('--n', type=int, default=300, help="neighbourhood size")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs of every stage after the cold one")
+    parser.add_argument('--pairs', type=int, default=1000, help="user pairs the similarity functions score")
+    parser.add_argument('--block', type=int, default=100, help="users the vectorized similarities score")
+    parser.add_argument('--users', type=int, default=50, help="users whose neighbourhoods are found")
+    parser.add_argument('--predictions', type=int, default=500, help="(user, movie) pairs predicted")
+    parser.add_argument('--recommendations', type=int, default=5, help="users recommendations are made for")
+    parser.add_argument('--percentage', type=float, default=.01, help="hold-out of the evaluate stage")
+    parser.add_argument('--tests', type=int, default=5000, help="lines of the synthetic test files")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default='-', help="JSON results file, '-' for stdout")
+    parser.add_argument('--compare', default=None, help="JSON results of an earlier run to compare with")
+    parser.add_argument('--tolerance', type=float, default=.2, help="slowdown --compare reports, a fraction")
+    args = parser.parse_args()
+    
+    directory = tempfile.mkdtemp(prefix='benchmark')
+    try:
+        datasets = [] if args.no_bundled else [{'name': 'bundled', 'ratings': args.ratings,
+                                                'movies': args.movies, 'test': args.test}]
+        datasets += [makeSynthetic(spec, directory, args.tests, args.seed) for spec in args.synthetic]
+        results = {'meta': describe(args),
+                   'runs': [run(dataset, backend, args, directory) for dataset in datasets for backend in args.backend]}
+    finally:
+        shutil.rmtree(directory)
+    
+    data = json.dumps(results, indent=1, sort_keys=True)
+    if args.output == '-':
+        print(data)
+    else:
+        outfile = open(args.output, 'w')
+        outfile.write(data + '\n')
+        outfile.close()
+    
+    if args.compare is not None:
+        slower = compare(results, json.load(open(args.compare)), args.tolerance)
+        for line in slower:
+            print("slower: " + line, file=sys.stderr)
+        if slower:
+            sys.exit(1)
+
+
+
+if __name__ == '__main__':
+    main()
+
+
+
+''' ******* The End ****** '''
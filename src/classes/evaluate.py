@@ -10,54 +10,99 @@ This file implements the Evaluate class.
 
 from __future__ import division, print_function
 from random import random
-import copy
 import math
+import multiprocessing
+import numpy
+import functions.similarity
+import instrumentation
 import recommender
 
+
+
+# the Evaluate forked worker processes read from, see crossValidate()
+_shared = None
+
+
+
+'''_testFold() function'''
+def _testFold(task):
+    ''' runs in a worker process: tests one fold of a cross-validation'''
+    (fold, similarity, n, formula) = task
+    return _shared.testFold(fold, similarity, n, formula)
+
+
+
 ''' A class that performs a hold-out evaluation of a recommender system'''
 class Evaluate(object):
     
     '''Constructor'''
-    def __init__(self,recommender):
+    def __init__(self,recommender, seed=None):
         self.rec = recommender
         self.movies = self.rec.getMovies()
         self.results = []       # list of results [(actual, prediction)] 
         self.coverage = 0       # percentage of tests that can't be rated
         self.MSE = 0            # MSE result of test
+        self.RMSE = 0           # root of the MSE
+        self.MAE = 0            # mean absolute error of test
+        self.foldStats = []     # per-fold statistics of the last cross-validation
+        self.folds = None       # fold of every stored rating during a cross-validation
+        self.random = numpy.random.RandomState(seed)  # draws the test ratings
     
     
     
     '''splitTestData() method'''
     def splitTestData(self,numTestRatings):
         ''' set up training data from ratings matrix '''
-        self.training = copy.deepcopy(self.rec.getRatings())  #training ratings matrix
-        self.test = []          #test data [(user, movie, rating)]
+        ''' the test ratings are drawn from the list of stored ratings, the training'''
+        ''' ratings are the shared ratings matrix with the test ratings masked out'''
+        numRatings = self.rec.getMatrix().getNumRatings()
         
         ''' extract out numOfRatings ratings and save as test data, remove from ratings matrix'''
-        count=0;
-        while count < numTestRatings :
-            #get random user and rating
-            rUser = self.rec.getRandomUser()
-            rMovie = self.rec.getRandomMovie()
-            
-            #check to see that this rating exists
-            if rMovie in self.training.get(rUser):
-                #set it up in test data and remove it from training data, increment count
-                self.test.append((rUser, rMovie, self.training[rUser][rMovie])) 
-                self.training[rUser].pop(rMovie)    #pop() removes item and returns its value
-                count+=1;
+        positions = self.random.choice(numRatings, int(numTestRatings), replace=False)
+        (self.test, self.training) = self.holdOut(positions)  #test data [(user, movie, rating)], training matrix
+    
+    
+    
+    '''holdOut() method'''
+    def holdOut(self, positions):
+        ''' returns the ratings stored at positions of the ratings matrix as test data'''
+        ''' [(user, movie, rating)] and the matrix without them as training matrix'''
+        matrix = self.rec.getMatrix()
+        (userIds, itemIds, values) = matrix.getEntries(positions)
+        test = [(matrix.users[uid], matrix.items[iid], rating)
+                for (uid, iid, rating) in zip(userIds.tolist(), itemIds.tolist(), values.tolist())]
+        
+        keep = numpy.ones(matrix.getNumRatings(), dtype=bool)
+        keep[positions] = False
+        return (test, matrix.mask(keep))
     
     
     
     '''performTest() method'''
     def performTest(self):
         ''' Generate prediction for each of the tests in test data and store results '''
- 
-        newRec = recommender.Recommender(ratings=self.training, loadFromFiles=False)
+        self.results.extend(self.predictTests(self.test, self.training))
+    
+    
+    
+    '''predictTests() method'''
+    def predictTests(self, test, training, similarity=functions.similarity.weighted_similarity, n=300,
+                     formula='resnick'):
+        ''' returns [(actual, prediction)] for the test data, predicted from training'''
+        newRec = recommender.Recommender(loadFromFiles=False, backend=self.rec.backend,
+                                         matrix=training)
+        newRec.maxNeighbours = self.rec.maxNeighbours
+        newRec.setMinCorated(self.rec.minCorated)
+        newRec.setSignificance(self.rec.significance)
+        newRec.setEngine(self.rec.engine, **self.rec.engineParams)
+        newRec.setApproximate(**(self.rec.approximate or {}))
+        newRec.instrument = self.rec.instrument
         
-        for (user, movie, rating) in self.test:
-            prediction = newRec.getPrediction(user, movie)
-            self.results.append((rating, prediction))
+        # predict every test rating in one batch, grouped by user
+        predictions = newRec.predictBatch([(user, movie) for (user, movie, rating) in test],
+                                          similarity, n, formula)
+        
+        return [(rating, prediction) for ((user, movie, rating), prediction) in zip(test, predictions)]
     
     
     
@@ -67,26 +112,118 @@ class Evaluate(object):
         # the smallest integer value greater than or equal to x
         numTestRatings = math.ceil(self.rec.getNumRatings() * percentage)
         
+        # the stages are recorded by the instrument of the recommender, if it has one
         while iterations > 0:
-            self.splitTestData(numTestRatings)
-            self.performTest()
+            instrumentation.timed(self.rec.instrument, 'split', self.splitTestData, numTestRatings)
+            instrumentation.timed(self.rec.instrument, 'test', self.performTest)
             iterations -= 1
         
         ''' process results - calculate MSE and numCantRate '''
+        self.setStats(self.measure(self.results))
+    
+    
+    
+    '''crossValidate() method'''
+    def crossValidate(self, folds=5, seed=None, processes=None,
+                      similarity=functions.similarity.weighted_similarity, n=300, formula='resnick'):
+        ''' k-fold cross-validation: the ratings are dealt into folds at random (seed'''
+        ''' makes the folds reproducible) and each fold is predicted from the others'''
+        ''' processes > 1 tests the folds in a pool of forked worker processes, which'''
+        ''' share the ratings matrix copy-on-write'''
+        ''' returns the statistics of every fold and the aggregate over all ratings,'''
+        ''' each a dict with the MSE, RMSE, MAE, coverage and number of tests'''
+        ''' the recommender's engine is trained on each training fold: run it once per'''
+        ''' engine with the same seed to compare them on the same folds'''
+        global _shared
+        if folds < 2:
+            raise ValueError("cross-validation needs at least 2 folds: %r" % (folds,))
+        
+        self.makeFolds(folds, seed)
+        tasks = [(fold, similarity, n, formula) for fold in range(folds)]
+        try:
+            if processes is not None and processes > 1:
+                # build what every worker reads before forking
+                self.rec.getMatrix()
+                _shared = self
+                pool = multiprocessing.Pool(min(processes, folds))
+                try:
+                    foldResults = pool.map(_testFold, tasks)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                foldResults = [self.testFold(*task) for task in tasks]
+        finally:
+            _shared = None
+            self.folds = None
+        
+        self.foldStats = [self.measure(results) for results in foldResults]
+        self.results = [result for results in foldResults for result in results]
+        total = self.measure(self.results)
+        self.setStats(total)
+        return (self.foldStats, total)
+    
+    
+    
+    '''makeFolds() method'''
+    def makeFolds(self, folds, seed=None):
+        ''' deals the stored ratings into folds of equal size at random, seed makes'''
+        ''' the folds reproducible; self.folds holds the fold of every rating'''
+        numRatings = self.rec.getMatrix().getNumRatings()
+        order = numpy.random.RandomState(seed).permutation(numRatings)
+        self.folds = numpy.empty(numRatings, dtype=numpy.int32)
+        self.folds[order] = numpy.arange(numRatings) % folds
+    
+    
+    
+    '''getFold() method'''
+    def getFold(self, fold):
+        ''' returns the test data and training matrix of fold, see makeFolds()'''
+        return self.holdOut(numpy.flatnonzero(self.folds == fold))
+    
+    
+    
+    '''testFold() method'''
+    def testFold(self, fold, similarity=functions.similarity.weighted_similarity, n=300, formula='resnick'):
+        ''' returns [(actual, prediction)] for the ratings of fold, predicted from the others'''
+        (test, training) = self.getFold(fold)
+        return self.predictTests(test, training, similarity, n, formula)
+    
+    
+    
+    '''measure() method'''
+    def measure(self, results):
+        ''' returns the statistics of [(actual, prediction)] results as a dict'''
+        ''' the errors are over the ratings that could be predicted (prediction != -1)'''
         sumsq = 0.0
+        sumAbs = 0.0
         numNotRated = 0.0
-        for (rating, pred) in self.results:
+        for (rating, pred) in results:
             if pred == -1:
                 numNotRated += 1;
             else :
                 sumsq += math.pow((rating-pred),2)
+                sumAbs += math.fabs(rating-pred)
         
         # number of rated items
-        numRated = len(self.results) - numNotRated
+        numRated = len(results) - numNotRated
         
-        # calculate coverage and Mean Squared Error
-        self.coverage = numRated / len(self.results)
-        self.MSE = sumsq / numRated
+        # calculate coverage and Mean Squared / Absolute Errors
+        mse = sumsq / numRated if numRated else float('nan')
+        return {'mse': mse,
+                'rmse': math.sqrt(mse),
+                'mae': sumAbs / numRated if numRated else float('nan'),
+                'coverage': numRated / len(results) if results else 0.0,
+                'tests': len(results)}
+    
+    
+    
+    '''setStats() method'''
+    def setStats(self, stats):
+        self.MSE = stats['mse']
+        self.RMSE = stats['rmse']
+        self.MAE = stats['mae']
+        self.coverage = stats['coverage']
     
     
     
@@ -96,10 +233,28 @@ class Evaluate(object):
     
     
     
+    '''getRMSE() method'''
+    def getRMSE(self):
+        return self.RMSE
+    
+    
+    
+    '''getMAE() method'''
+    def getMAE(self):
+        return self.MAE
+    
+    
+    
     '''getCoverage() method'''
     def getCoverage(self):
         return self.coverage
     
     
     
+    '''getFoldStats() method'''
+    def getFoldStats(self):
+        return self.foldStats
+    
+    
+    
     ''' ******* The End ****** '''
\ No newline at end of file
@@ -0,0 +1,140 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the Factorization class.
+'''
+
+from __future__ import division, print_function
+import numpy
+import scipy.sparse
+
+
+
+''' A class that models the ratings matrix as biased latent factors '''
+class Factorization(object):
+    
+    '''constructor'''
+    def __init__(self, matrix, factors=20, regularization=0.1, iterations=15, seed=None):
+        ''' matrix is the RatingMatrix to learn from'''
+        ''' a rating is modelled as mean + user bias + item bias + user . item factors,'''
+        ''' fitted by alternating least squares; regularization is scaled by the number'''
+        ''' of ratings of each user and item (weighted-lambda regularization)'''
+        if factors < 1:
+            raise ValueError("factorization needs at least 1 factor: %r" % (factors,))
+        self.matrix = matrix
+        self.numFactors = factors
+        self.regularization = regularization
+        self.iterations = iterations
+        self.random = numpy.random.RandomState(seed)    # draws the initial factors
+        self.mean = 0.0                                 # mean of all the ratings
+        self.userBiases = numpy.zeros(0)
+        self.itemBiases = numpy.zeros(0)
+        self.userFactors = numpy.zeros((0, factors))
+        self.itemFactors = numpy.zeros((0, factors))
+        self.bounds = (1.0, 5.0)                        # predictions are clipped to these
+    
+    
+    
+    '''train() method'''
+    def train(self):
+        ''' fits the biases and factors to every rating of the matrix, returns self'''
+        ''' each half step solves the least squares problems of all users (or items) at'''
+        ''' once: their normal equations are summed with two sparse matrix products and'''
+        ''' solved as one stack of small linear systems'''
+        matrix = self.matrix
+        data = matrix.csr.data
+        self.mean = float(data.mean()) if len(data) else 0.0
+        if len(data):
+            self.bounds = (float(data.min()), float(data.max()))
+        
+        scale = 0.1 / numpy.sqrt(self.numFactors)
+        self.userFactors = self.random.normal(0, scale, (matrix.getNumUsers(), self.numFactors))
+        self.itemFactors = self.random.normal(0, scale, (matrix.getNumItems(), self.numFactors))
+        self.userBiases = numpy.zeros(matrix.getNumUsers())
+        self.itemBiases = numpy.zeros(matrix.getNumItems())
+        
+        for iteration in range(self.iterations):
+            (self.userFactors, self.userBiases) = self._solve(matrix.csr, self.itemFactors, self.itemBiases)
+            (self.itemFactors, self.itemBiases) = self._solve(matrix.csc.T.tocsr(), self.userFactors,
+                                                              self.userBiases)
+        return self
+    
+    
+    
+    '''_solve() method'''
+    def _solve(self, rows, otherFactors, otherBiases):
+        ''' returns the factors and biases of every row of the csr matrix rows given'''
+        ''' the factors and biases of its columns'''
+        ''' a row's unknowns are [factors, bias], a column's inputs are [factors, 1]'''
+        numRows = rows.shape[0]
+        size = self.numFactors + 1
+        inputs = numpy.hstack([otherFactors, numpy.ones((len(otherFactors), 1))])
+        
+        # the ratings less what the mean and the column biases explain
+        residuals = scipy.sparse.csr_matrix((rows.data - self.mean - otherBiases[rows.indices],
+                                             rows.indices, rows.indptr), shape=rows.shape)
+        indicator = scipy.sparse.csr_matrix((numpy.ones(len(rows.data)), rows.indices, rows.indptr),
+                                            shape=rows.shape)
+        
+        # normal equations: sum of the input outer products and of the weighted inputs
+        outer = (inputs[:, :, numpy.newaxis] * inputs[:, numpy.newaxis, :]).reshape(len(inputs), -1)
+        grams = numpy.asarray(indicator.dot(outer)).reshape(numRows, size, size)
+        targets = numpy.asarray(residuals.dot(inputs))
+        
+        counts = numpy.diff(rows.indptr)
+        grams += (self.regularization * numpy.maximum(counts, 1))[:, numpy.newaxis, numpy.newaxis] * \
+                 numpy.eye(size)
+        solution = numpy.linalg.solve(grams, targets[:, :, numpy.newaxis])[:, :, 0]
+        return (solution[:, :-1].copy(), solution[:, -1].copy())
+    
+    
+    
+    '''foldIn() method'''
+    def foldIn(self, uid):
+        ''' refits the factors and bias of user uid to the current ratings of the'''
+        ''' matrix, keeping the items fixed; new users and items are added first, a new'''
+        ''' item with zero factors and bias until the model is trained again'''
+        (self.userFactors, self.userBiases) = self._grow(self.userFactors, self.userBiases,
+                                                         self.matrix.getNumUsers())
+        (self.itemFactors, self.itemBiases) = self._grow(self.itemFactors, self.itemBiases,
+                                                         self.matrix.getNumItems())
+        
+        row = self.matrix.csr[uid]
+        (factors, biases) = self._solve(row, self.itemFactors, self.itemBiases)
+        self.userFactors[uid] = factors[0]
+        self.userBiases[uid] = biases[0]
+    
+    
+    
+    '''_grow() method'''
+    def _grow(self, factors, biases, size):
+        ''' returns factors and biases padded with zeros to size rows'''
+        if size <= len(biases):
+            return (factors, biases)
+        grow = size - len(biases)
+        return (numpy.vstack([factors, numpy.zeros((grow, self.numFactors))]),
+                numpy.concatenate([biases, numpy.zeros(grow)]))
+    
+    
+    
+    '''predict() method'''
+    def predict(self, uid, itemIds):
+        ''' returns the predicted ratings of user uid for the dense item ids itemIds'''
+        itemIds = numpy.asarray(itemIds, dtype=numpy.int64)
+        scores = self.mean + self.userBiases[uid] + self.itemBiases[itemIds] + \
+                 self.itemFactors[itemIds].dot(self.userFactors[uid])
+        return numpy.clip(scores, self.bounds[0], self.bounds[1])
+    
+    
+    
+    '''scoreItems() method'''
+    def scoreItems(self, uid):
+        ''' returns the predicted ratings of user uid for every item, one matrix-vector product'''
+        scores = self.mean + self.userBiases[uid] + self.itemBiases + self.itemFactors.dot(self.userFactors[uid])
+        return numpy.clip(scores, self.bounds[0], self.bounds[1])
+    
+    
+    
+    ''' ******* The End ****** '''
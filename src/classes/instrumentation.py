@@ -0,0 +1,202 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the Instrument class, which records where the time of
+the recommender goes: per-stage timers, counters and hooks, plus an optional
+cProfile run over the instrumented stages.
+'''
+
+from __future__ import division, print_function
+import atexit
+import cProfile
+import pstats
+import StringIO
+import timeit
+
+
+
+'''timed() function'''
+def timed(instrument, name, function, *args, **kwargs):
+    ''' returns function(*args, **kwargs), timed as stage name of instrument'''
+    ''' instrument None runs function as is, which is all instrumentation costs when off'''
+    if instrument is None:
+        return function(*args, **kwargs)
+    with instrument.stage(name):
+        return function(*args, **kwargs)
+
+
+
+''' A class that times one run of a stage, see Instrument.stage() '''
+class Stage(object):
+    
+    '''constructor'''
+    def __init__(self, instrument, name):
+        self.instrument = instrument
+        self.name = name
+        self.start = None
+    
+    
+    
+    '''__enter__() method'''
+    def __enter__(self):
+        self.instrument.enter()
+        self.start = timeit.default_timer()
+        return self
+    
+    
+    
+    '''__exit__() method'''
+    def __exit__(self, *exception):
+        self.instrument.record(self.name, timeit.default_timer() - self.start)
+        self.instrument.leave()
+        return False
+
+
+
+''' A class that records timers and counters of the recommender's stages '''
+class Instrument(object):
+    
+    '''constructor'''
+    def __init__(self, profile=None):
+        ''' timers add up the calls and seconds of every stage; stages nest, so the time'''
+        ''' of a stage includes that of the stages run inside it'''
+        ''' counters add up the amounts of count()'''
+        ''' profile is a file name: the outermost stages are run under cProfile and its'''
+        ''' statistics are dumped to the file on exit, see dumpProfile()'''
+        self.timers = {}        # stage -> [calls, seconds]
+        self.counters = {}      # counter -> total
+        self.hooks = []         # called with every record, see addHook()
+        self.depth = 0          # stages open right now
+        self.profile = profile
+        self.profiler = None
+        if profile is not None:
+            self.profiler = cProfile.Profile()
+            atexit.register(self.dumpProfile)
+    
+    
+    
+    '''stage() method'''
+    def stage(self, name):
+        ''' returns a context manager that times the with block as stage name'''
+        return Stage(self, name)
+    
+    
+    
+    '''enter() method'''
+    def enter(self):
+        ''' a stage starts: the profiler runs while any stage is open'''
+        if self.depth == 0 and self.profiler is not None:
+            self.profiler.enable()
+        self.depth += 1
+    
+    
+    
+    '''leave() method'''
+    def leave(self):
+        ''' a stage ends'''
+        self.depth -= 1
+        if self.depth == 0 and self.profiler is not None:
+            self.profiler.disable()
+    
+    
+    
+    '''record() method'''
+    def record(self, name, seconds):
+        ''' adds a run of seconds to the timer of stage name'''
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = [0, 0.0]
+        timer[0] += 1
+        timer[1] += seconds
+        for hook in self.hooks:
+            hook('stage', name, seconds)
+    
+    
+    
+    '''count() method'''
+    def count(self, name, amount=1):
+        ''' adds amount to counter name'''
+        self.counters[name] = self.counters.get(name, 0) + amount
+        for hook in self.hooks:
+            hook('count', name, amount)
+    
+    
+    
+    '''addHook() method'''
+    def addHook(self, hook):
+        ''' hook(kind, name, value) is called on every record: kind 'stage' with the'''
+        ''' seconds of a run of stage name, 'count' with the amount added to counter name'''
+        self.hooks.append(hook)
+    
+    
+    
+    '''removeHook() method'''
+    def removeHook(self, hook):
+        self.hooks.remove(hook)
+    
+    
+    
+    '''reset() method'''
+    def reset(self):
+        ''' zeroes the timers, the counters and the profile, the hooks are kept'''
+        self.timers = {}
+        self.counters = {}
+        if self.profiler is not None:
+            self.profiler = cProfile.Profile()
+    
+    
+    
+    '''getTimers() method'''
+    def getTimers(self):
+        ''' returns {stage: {calls, seconds, mean}}, seconds in total and per call'''
+        return dict((name, {'calls': calls, 'seconds': seconds, 'mean': seconds / calls})
+                    for (name, (calls, seconds)) in self.timers.items())
+    
+    
+    
+    '''getCounters() method'''
+    def getCounters(self):
+        return dict(self.counters)
+    
+    
+    
+    '''formatReport() method'''
+    def formatReport(self):
+        ''' returns the timers, slowest first, and the counters as a text table'''
+        ''' counters are also given per prediction when there were predictions'''
+        lines = ["%-20s %10s %12s %12s" % ('stage', 'calls', 'seconds', 'ms/call')]
+        for (name, (calls, seconds)) in sorted(self.timers.items(), key=lambda timer: -timer[1][1]):
+            lines.append("%-20s %10d %12.4f %12.4f" % (name, calls, seconds, 1000 * seconds / calls))
+        
+        predictions = self.counters.get('predictions', 0)
+        lines.append('')
+        lines.append("%-20s %12s %14s" % ('counter', 'total', 'per prediction'))
+        for (name, total) in sorted(self.counters.items()):
+            lines.append("%-20s %12d %14s" % (name, total, "%.2f" % (total / predictions) if predictions else '-'))
+        return '\n'.join(lines)
+    
+    
+    
+    '''dumpProfile() method'''
+    def dumpProfile(self, filename=None):
+        ''' writes the cProfile statistics to filename, by default the profile file'''
+        ''' they can be read with pstats or a viewer such as snakeviz'''
+        if self.profiler is not None:
+            self.profiler.dump_stats(filename or self.profile)
+    
+    
+    
+    '''formatProfile() method'''
+    def formatProfile(self, sort='cumulative', limit=30):
+        ''' returns the limit most costly functions of the profile, sorted by sort'''
+        if self.profiler is None:
+            return ''
+        output = StringIO.StringIO()
+        pstats.Stats(self.profiler, stream=output).sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+    
+    
+    
+    ''' ******* The End ****** '''
@@ -0,0 +1,102 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the LRUCache class.
+'''
+
+from __future__ import division, print_function
+import collections
+
+
+
+''' A class that keeps the most recently used results up to a fixed number of entries '''
+class LRUCache(object):
+    
+    '''constructor'''
+    def __init__(self, maxSize=10000):
+        ''' maxSize is the most entries kept, the least recently used go first'''
+        if maxSize < 1:
+            raise ValueError("cache size must be at least 1: %r" % (maxSize,))
+        self.maxSize = maxSize
+        self.entries = collections.OrderedDict()    # key -> (value, tags), oldest first
+        self.tagged = {}        # tag -> keys of the entries with that tag
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    
+    
+    '''get() method'''
+    def get(self, key, default=None):
+        ''' returns the value cached under key, or default when there is none'''
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return default
+        # back in as the most recently used
+        self.entries[key] = entry
+        self.hits += 1
+        return entry[0]
+    
+    
+    
+    '''put() method'''
+    def put(self, key, value, tags=()):
+        ''' caches value under key; invalidate() with any of tags removes it again'''
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = (value, tuple(tags))
+        for tag in tags:
+            self.tagged.setdefault(tag, set()).add(key)
+        
+        while len(self.entries) > self.maxSize:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+    
+    
+    
+    '''invalidate() method'''
+    def invalidate(self, tag):
+        ''' removes every entry cached with tag'''
+        for key in list(self.tagged.get(tag, ())):
+            self._remove(key)
+    
+    
+    
+    '''clear() method'''
+    def clear(self):
+        ''' removes every entry, the counters are kept'''
+        self.entries.clear()
+        self.tagged = {}
+    
+    
+    
+    '''_remove() method'''
+    def _remove(self, key):
+        ''' removes the entry of key and its tags'''
+        (value, tags) = self.entries.pop(key)
+        for tag in tags:
+            keys = self.tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self.tagged[tag]
+    
+    
+    
+    '''getCounters() method'''
+    def getCounters(self):
+        ''' returns the hits, misses, evictions and current size as a dict'''
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.entries), 'maxSize': self.maxSize}
+    
+    
+    
+    '''__len__() method'''
+    def __len__(self):
+        return len(self.entries)
+    
+    
+    
+    ''' ******* The End ****** '''
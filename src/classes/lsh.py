@@ -0,0 +1,102 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the LSHIndex class.
+'''
+
+from __future__ import division, print_function
+import numpy
+
+
+
+''' A class that finds candidate neighbours of a user by random-projection hashing '''
+class LSHIndex(object):
+    
+    '''constructor'''
+    def __init__(self, stats, tables=10, bits=8, probes=1, seed=None):
+        ''' stats is the UserStats cache of the ratings matrix to hash the users of'''
+        ''' every user gets a bits-long signature in each of tables hash tables: the signs'''
+        ''' of its mean-centred rating vector projected on random hyperplanes. Users whose'''
+        ''' vectors point the same way (a high pearson correlation) tend to share a bucket'''
+        ''' probes=1 also looks in the buckets one bit away from the user's own one'''
+        ''' more tables and probes find more of the true neighbours, more bits make the'''
+        ''' buckets smaller and the search faster'''
+        if bits < 1 or bits > 62:
+            raise ValueError("number of bits out of range: %r" % (bits,))
+        if probes not in (0, 1):
+            raise ValueError("probes must be 0 or 1: %r" % (probes,))
+        self.stats = stats
+        self.numTables = tables
+        self.bits = bits
+        self.probes = probes
+        numItems = stats.matrix.getNumItems()
+        self.planes = numpy.random.RandomState(seed).normal(size=(numItems, tables * bits))
+        self.weights = numpy.left_shift(1, numpy.arange(bits, dtype=numpy.int64))
+        self.codes = numpy.zeros((0, tables), dtype=numpy.int64)    # bucket of every user per table
+        self.orders = None      # users of every table sorted by bucket, see _sort()
+        self.sortedCodes = None
+        self.build()
+    
+    
+    
+    '''build() method'''
+    def build(self):
+        ''' hashes every user'''
+        self.codes = self._hash(numpy.arange(self.stats.matrix.getNumUsers()))
+        self.orders = None
+    
+    
+    
+    '''_hash() method'''
+    def _hash(self, rows):
+        ''' returns the len(rows) x tables bucket codes of the users in rows'''
+        centred = self.stats.getParts()[2][0][rows]
+        numItems = min(centred.shape[1], len(self.planes))
+        # items added since the planes were drawn have no hyperplane component
+        projections = centred[:, :numItems].dot(self.planes[:numItems])
+        signs = (projections > 0).reshape(len(rows), self.numTables, self.bits)
+        return signs.dot(self.weights)
+    
+    
+    
+    '''_sort() method'''
+    def _sort(self):
+        ''' sorts the users of every table by bucket, so a bucket is a slice'''
+        self.orders = numpy.argsort(self.codes, axis=0, kind='mergesort').T
+        self.sortedCodes = numpy.array([self.codes[order, table] for (table, order) in enumerate(self.orders)])
+    
+    
+    
+    '''candidates() method'''
+    def candidates(self, uid):
+        ''' returns the sorted dense ids of the users sharing a probed bucket with uid'''
+        if self.orders is None:
+            self._sort()
+        flips = numpy.concatenate(([0], self.weights)) if self.probes else numpy.zeros(1, dtype=numpy.int64)
+        found = []
+        for table in range(self.numTables):
+            probed = numpy.bitwise_xor(self.codes[uid, table], flips)
+            starts = numpy.searchsorted(self.sortedCodes[table], probed, 'left')
+            ends = numpy.searchsorted(self.sortedCodes[table], probed, 'right')
+            found.extend(self.orders[table][start:end] for (start, end) in zip(starts, ends))
+        found = numpy.unique(numpy.concatenate(found))
+        return found[found != uid]
+    
+    
+    
+    '''update() method'''
+    def update(self, uid):
+        ''' rehashes user uid after its ratings changed, a new user is added'''
+        numUsers = self.stats.matrix.getNumUsers()
+        if numUsers > len(self.codes):
+            grow = numpy.zeros((numUsers - len(self.codes), self.numTables), dtype=numpy.int64)
+            self.codes = numpy.vstack([self.codes, grow])
+        self.codes[uid] = self._hash(numpy.array([uid]))[0]
+        # the tables are sorted again on the next search
+        self.orders = None
+    
+    
+    
+    ''' ******* The End ****** '''
@@ -0,0 +1,234 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the NeighbourIndex class.
+'''
+
+from __future__ import division, print_function
+import numpy
+import functions.storage
+
+
+
+''' A class that keeps the top k most similar users of every user (or items of every item) '''
+class NeighbourIndex(object):
+    
+    '''constructor'''
+    def __init__(self, scoreRows, numUsers, k=300, tieBreak=None, blockSize=1024, path=None, fingerprint=None):
+        ''' scoreRows(rows) returns the len(rows) x numUsers similarity scores of rows'''
+        ''' tieBreak ranks users with equal scores (higher rank first), defaults to the id'''
+        ''' path is a file name prefix to keep the lists in memory-mapped .npy files;'''
+        ''' lists stored there before for numUsers users, the same k and the same'''
+        ''' fingerprint of the ratings they were computed from are reused'''
+        self.scoreRows = scoreRows
+        self.k = k
+        self.blockSize = blockSize
+        self.path = path
+        self.fingerprint = fingerprint
+        self.tieBreak = numpy.arange(numUsers) if tieBreak is None else numpy.asarray(tieBreak)
+        self.neighbours = numpy.empty((0, k), dtype=numpy.int32)   # neighbour ids, best first
+        self.scores = numpy.empty((0, k))                           # their similarity scores
+        self.lengths = numpy.empty(0, dtype=numpy.int32)            # number of neighbours kept
+        self.stale = set()      # users whose list must be recomputed before use
+        if not self.open(numUsers):
+            self.build(numUsers)
+    
+    
+    
+    '''open() method'''
+    def open(self, numUsers):
+        ''' maps the lists stored under path, returns False if there are none to reuse'''
+        ''' the mapping is copy-on-write: updates are never written back to the files'''
+        if self.path is None:
+            return False
+        neighbours = functions.storage.open_array(self._filename('neighbours'), (numUsers, self.k), numpy.int32,
+                                                  self.fingerprint)
+        scores = functions.storage.open_array(self._filename('scores'), (numUsers, self.k), numpy.float64,
+                                              self.fingerprint)
+        lengths = functions.storage.open_array(self._filename('lengths'), (numUsers,), numpy.int32,
+                                               self.fingerprint)
+        if neighbours is None or scores is None or lengths is None:
+            return False
+        (self.neighbours, self.scores, self.lengths) = (neighbours, scores, lengths)
+        self.stale = set()
+        return True
+    
+    
+    
+    '''build() method'''
+    def build(self, numUsers):
+        ''' selects the top k of every user, one block of score rows at a time'''
+        self.neighbours = self._allocate('neighbours', (numUsers, self.k), numpy.int32, -1)
+        self.scores = self._allocate('scores', (numUsers, self.k), numpy.float64, 0)
+        self.lengths = self._allocate('lengths', (numUsers,), numpy.int32, 0)
+        self.stale = set()
+        
+        for start in range(0, numUsers, self.blockSize):
+            rows = numpy.arange(start, min(start + self.blockSize, numUsers))
+            block = self.scoreRows(rows)
+            for (uid, scores) in zip(rows, block):
+                self._select(uid, scores)
+        
+        if self.path is not None:
+            self.neighbours = functions.storage.publish_array(self._filename('neighbours'), self.neighbours,
+                                                              self.fingerprint)
+            self.scores = functions.storage.publish_array(self._filename('scores'), self.scores,
+                                                          self.fingerprint)
+            self.lengths = functions.storage.publish_array(self._filename('lengths'), self.lengths,
+                                                           self.fingerprint)
+    
+    
+    
+    '''_allocate() method'''
+    def _allocate(self, name, shape, dtype, fill):
+        ''' returns a new array for the lists, a file to publish when path is set'''
+        if self.path is None:
+            return numpy.full(shape, fill, dtype=dtype)
+        return functions.storage.create_array(self._filename(name), shape, dtype, fill)
+    
+    
+    
+    '''_filename() method'''
+    def _filename(self, name):
+        return '%s_%s.npy' % (self.path, name)
+    
+    
+    
+    '''_select() method'''
+    def _select(self, uid, scores):
+        ''' keeps the k best positive scores of one score row as the list of uid'''
+        scores = numpy.array(scores, dtype=numpy.float64)
+        scores[uid] = 0
+        candidates = numpy.flatnonzero(scores > 0)
+        
+        # partial selection of the k best, only those get sorted
+        if len(candidates) > self.k:
+            part = numpy.argpartition(-scores[candidates], self.k - 1)[:self.k]
+            # users tied with the k-th best compete on tieBreak like the others
+            candidates = candidates[scores[candidates] >= scores[candidates[part]].min()]
+        order = numpy.lexsort((self.tieBreak[candidates], scores[candidates]))[::-1][:self.k]
+        candidates = candidates[order]
+        
+        length = len(candidates)
+        self.neighbours[uid, :length] = candidates
+        self.neighbours[uid, length:] = -1
+        self.scores[uid, :length] = scores[candidates]
+        self.scores[uid, length:] = 0
+        self.lengths[uid] = length
+    
+    
+    
+    '''getNeighbours() method'''
+    def getNeighbours(self, uid, n=None):
+        ''' returns the ids and scores of the (at most n) best neighbours of uid'''
+        if uid in self.stale:
+            self._select(uid, self.scoreRows(numpy.array([uid]))[0])
+            self.stale.discard(uid)
+        
+        length = self.lengths[uid] if n is None else min(n, self.lengths[uid])
+        return (self.neighbours[uid, :length], self.scores[uid, :length])
+    
+    
+    
+    '''update() method'''
+    def update(self, uid, numUsers=None):
+        ''' refreshes the index after the ratings of uid changed'''
+        ''' only the list of uid is recomputed, other lists are patched where uid'''
+        ''' enters, moves or leaves them; a full list uid leaves is recomputed lazily'''
+        ''' returns the ids of the users whose list changed or went stale'''
+        if numUsers is not None and numUsers > len(self.lengths):
+            self._grow(numUsers)
+        
+        scores = numpy.array(self.scoreRows(numpy.array([uid]))[0], dtype=numpy.float64)
+        self._select(uid, scores)
+        self.stale.discard(uid)
+        
+        # similarity is symmetric: scores[v] is also the new score of uid for user v
+        scores[uid] = 0
+        members = (self.neighbours == uid).any(axis=1)
+        full = self.lengths == self.k
+        last = numpy.where(full, self.scores[numpy.arange(len(self.lengths)), self.k - 1], 0)
+        entering = (scores > 0) & (~full | (scores >= last))
+        affected = members | entering
+        affected[uid] = False
+        affected[list(self.stale)] = False
+        
+        # uid fell out of a full list: the next best user is not known here
+        lost = affected & members & full & (scores <= last)
+        self.stale.update(numpy.flatnonzero(lost).tolist())
+        self._patch(numpy.flatnonzero(affected & ~lost), uid, scores)
+        affected[uid] = True
+        return numpy.flatnonzero(affected)
+    
+    
+    
+    '''invalidate() method'''
+    def invalidate(self, ids, numUsers=None):
+        ''' marks the lists of ids to be recomputed on their next use'''
+        if numUsers is not None and numUsers > len(self.lengths):
+            self._grow(numUsers)
+        self.stale.update(int(uid) for uid in ids)
+    
+    
+    
+    '''getTable() method'''
+    def getTable(self, n=None):
+        ''' returns the ids and scores of the (at most n) best neighbours of everyone'''
+        ''' as two arrays, ids padded with -1; stale lists are recomputed first'''
+        for uid in sorted(self.stale):
+            self._select(uid, self.scoreRows(numpy.array([uid]))[0])
+        self.stale = set()
+        
+        n = self.k if n is None else min(n, self.k)
+        return (self.neighbours[:, :n], self.scores[:, :n])
+    
+    
+    
+    '''_patch() method'''
+    def _patch(self, rows, uid, scores):
+        ''' moves uid to its new place in the lists of rows, scores[v] being the new'''
+        ''' score of uid for user v; the lists are already sorted, so every other'''
+        ''' entry only shifts by one at most: no list is sorted again'''
+        k = self.k
+        (ids, values) = (self.neighbours[rows], self.scores[rows])
+        score = scores[rows][:, numpy.newaxis]
+        entering = score[:, 0] > 0
+        
+        # the entries that stay, and the place of uid among them
+        kept = (ids != uid) & (numpy.arange(k) < self.lengths[rows][:, numpy.newaxis])
+        above = kept & ((values > score) | ((values == score) & (self.tieBreak[ids] > self.tieBreak[uid])))
+        place = above.sum(axis=1)
+        
+        before = numpy.cumsum(kept, axis=1) - 1
+        shift = entering[:, numpy.newaxis] & (before >= place[:, numpy.newaxis])
+        (row, column) = numpy.nonzero(kept)
+        destination = (before + shift)[row, column]
+        
+        newIds = numpy.full((len(rows), k + 1), -1, dtype=numpy.int32)
+        newValues = numpy.zeros((len(rows), k + 1))
+        newIds[row, destination] = ids[row, column]
+        newValues[row, destination] = values[row, column]
+        newIds[entering, place[entering]] = uid
+        newValues[entering, place[entering]] = score[entering, 0]
+        
+        self.neighbours[rows] = newIds[:, :k]
+        self.scores[rows] = newValues[:, :k]
+        self.lengths[rows] = numpy.minimum(kept.sum(axis=1) + entering, k)
+    
+    
+    
+    '''_grow() method'''
+    def _grow(self, numUsers):
+        ''' adds empty lists for users added since the index was built'''
+        ''' (held in memory from then on, like any other update of a mapped index)'''
+        extra = numUsers - len(self.lengths)
+        self.neighbours = numpy.vstack((self.neighbours, numpy.full((extra, self.k), -1, dtype=numpy.int32)))
+        self.scores = numpy.vstack((self.scores, numpy.zeros((extra, self.k))))
+        self.lengths = numpy.concatenate((self.lengths, numpy.zeros(extra, dtype=numpy.int32)))
+        self.tieBreak = numpy.concatenate((self.tieBreak, numpy.arange(len(self.tieBreak), numUsers)))
+    
+    
+    
+    ''' ******* The End ****** '''
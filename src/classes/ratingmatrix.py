@@ -0,0 +1,606 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the RatingMatrix class, a compact ratings store
+that maps users and movies to dense integer ids and keeps the ratings
+in compressed sparse row (user x item) and column (item x user) arrays,
+and the RatingsView and RowView classes that expose it through the
+same dict of dicts interface as Recommender.ratings.
+'''
+
+from __future__ import division, print_function
+import hashlib
+import os
+import numpy
+import scipy.sparse
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+
+
+''' A class that stores the ratings matrix as CSR and CSC arrays '''
+class RatingMatrix(object):
+    
+    '''constructor'''
+    def __init__(self, users, items, userIds, itemIds, values):
+        ''' users and items are the user and item keys, a key's position is its dense id'''
+        ''' userIds, itemIds and values are parallel arrays, one entry per rating'''
+        self.users = list(users)
+        self.items = list(items)
+        self.userIndex = dict((user, uid) for (uid, user) in enumerate(self.users))
+        self.itemIndex = dict((item, iid) for (iid, item) in enumerate(self.items))
+        
+        shape = (len(self.users), len(self.items))
+        values = numpy.asarray(values, dtype=numpy.float32)
+        
+        # user x item matrix: row u holds the sorted item ids and ratings of user u
+        self.csr = scipy.sparse.csr_matrix((values, (userIds, itemIds)), shape=shape)
+        self.csr.sort_indices()
+        # item x user matrix: column i holds the sorted user ids and ratings of item i
+        self.csc = self.csr.tocsc()
+        self.csc.sort_indices()
+        self.version = 0    # number of changes made by setUserRows()
+        self.edit = None    # how the last of them moved the entries, see spliceArray()
+    
+    
+    
+    '''fromTriples() method'''
+    @classmethod
+    def fromTriples(cls, users, items, values):
+        ''' builds a matrix from parallel lists of user keys, item keys and ratings'''
+        ''' a (user, item) pair that appears more than once keeps its last rating'''
+        userIndex = {}
+        itemIndex = {}
+        userIds = [userIndex.setdefault(user, len(userIndex)) for user in users]
+        itemIds = [itemIndex.setdefault(item, len(itemIndex)) for item in items]
+        return cls.fromIds(cls._keys(userIndex), cls._keys(itemIndex), userIds, itemIds, values)
+    
+    
+    
+    '''fromIds() method'''
+    @classmethod
+    def fromIds(cls, users, items, userIds, itemIds, values):
+        ''' builds a matrix from parallel sequences of dense user ids, item ids and ratings'''
+        ''' a (user, item) pair that appears more than once keeps its last rating'''
+        userIds = numpy.asarray(userIds, dtype=numpy.int64)
+        itemIds = numpy.asarray(itemIds, dtype=numpy.int64)
+        values = numpy.asarray(values, dtype=numpy.float32)
+        
+        # keep the last occurrence of every (user, item) pair, as dict assignment does
+        keys = userIds * max(len(items), 1) + itemIds
+        (_, first) = numpy.unique(keys[::-1], return_index=True)
+        keep = len(keys) - 1 - first
+        
+        return cls(users, items, userIds[keep], itemIds[keep], values[keep])
+    
+    
+    
+    '''fromDict() method'''
+    @classmethod
+    def fromDict(cls, ratings):
+        ''' builds a matrix from a ratings dict of dicts {user: {item: rating}}'''
+        users = []
+        items = []
+        values = []
+        for user in ratings:
+            for item in ratings[user]:
+                users.append(user)
+                items.append(item)
+                values.append(ratings[user][item])
+        
+        matrix = cls.fromTriples(users, items, values)
+        # users without any rating still get a (empty) row
+        empty = [user for user in ratings if user not in matrix.userIndex]
+        if empty:
+            matrix = cls(matrix.users + empty, matrix.items,
+                         *matrix.getTriples())
+        return matrix
+    
+    
+    
+    '''_keys() method'''
+    @staticmethod
+    def _keys(index):
+        ''' turns a {key: dense id} dict into the list of keys ordered by id'''
+        keys = [None] * len(index)
+        for (key, kid) in index.items():
+            keys[kid] = key
+        return keys
+    
+    
+    
+    '''getTriples() method'''
+    def getTriples(self):
+        ''' returns the (user ids, item ids, ratings) arrays of every stored rating'''
+        coo = self.csr.tocoo()
+        return (coo.row, coo.col, coo.data)
+    
+    
+    
+    '''getEntries() method'''
+    def getEntries(self, positions):
+        ''' returns the (user ids, item ids, ratings) arrays of the ratings stored at'''
+        ''' the given positions of the CSR arrays'''
+        positions = numpy.asarray(positions, dtype=numpy.int64)
+        userIds = numpy.searchsorted(self.csr.indptr, positions, side='right') - 1
+        return (userIds, self.csr.indices[positions], self.csr.data[positions])
+    
+    
+    
+    '''mask() method'''
+    def mask(self, keep):
+        ''' returns a matrix of the ratings whose CSR position is True in keep'''
+        ''' one vectorized pass over the arrays; the user and item keys and their'''
+        ''' indexes are shared with this matrix, so neither may add users or items'''
+        keep = numpy.asarray(keep, dtype=bool)
+        kept = numpy.concatenate(([0], numpy.cumsum(keep)))
+        
+        matrix = self.__class__.__new__(self.__class__)
+        (matrix.users, matrix.items) = (self.users, self.items)
+        (matrix.userIndex, matrix.itemIndex) = (self.userIndex, self.itemIndex)
+        matrix.csr = scipy.sparse.csr_matrix((self.csr.data[keep], self.csr.indices[keep],
+                                              kept[self.csr.indptr]), shape=self.csr.shape)
+        matrix.csr.has_sorted_indices = True
+        matrix.csc = matrix.csr.tocsc()
+        matrix.csc.sort_indices()
+        (matrix.version, matrix.edit) = (0, None)
+        return matrix
+    
+    
+    
+    '''getUserRow() method'''
+    def getUserRow(self, uid):
+        ''' returns the sorted item ids and the ratings of user uid'''
+        start, end = self.csr.indptr[uid], self.csr.indptr[uid + 1]
+        return (self.csr.indices[start:end], self.csr.data[start:end])
+    
+    
+    
+    '''getItemColumn() method'''
+    def getItemColumn(self, iid):
+        ''' returns the sorted user ids and the ratings given to item iid'''
+        start, end = self.csc.indptr[iid], self.csc.indptr[iid + 1]
+        return (self.csc.indices[start:end], self.csc.data[start:end])
+    
+    
+    
+    '''getRating() method'''
+    def getRating(self, uid, iid):
+        ''' returns the rating of user uid for item iid, or None if there is none'''
+        (indices, data) = self.getUserRow(uid)
+        pos = numpy.searchsorted(indices, iid)
+        if pos < len(indices) and indices[pos] == iid:
+            return float(data[pos])
+        return None
+    
+    
+    
+    '''getCorated() method'''
+    def getCorated(self, uid1, uid2):
+        ''' returns the ratings uid1 and uid2 gave to their mutually rated items'''
+        ''' as two parallel arrays, by intersecting the two sorted item id rows'''
+        (items1, values1) = self.getUserRow(uid1)
+        (items2, values2) = self.getUserRow(uid2)
+        mask1 = numpy.in1d(items1, items2, assume_unique=True)
+        mask2 = numpy.in1d(items2, items1, assume_unique=True)
+        return (values1[mask1], values2[mask2])
+    
+    
+    
+    '''getCoratedCounts() method'''
+    def getCoratedCounts(self, uid):
+        ''' returns an array with the number of items every user co-rated with uid'''
+        ''' read from the item -> users columns of the items uid rated, so it costs the'''
+        ''' number of ratings of those items rather than a pass over every user'''
+        itemIds = self.getUserRow(uid)[0]
+        starts = self.csc.indptr[itemIds]
+        lengths = self.csc.indptr[itemIds + 1] - starts
+        entries = numpy.arange(lengths.sum()) + numpy.repeat(starts - (numpy.cumsum(lengths) - lengths), lengths)
+        return numpy.bincount(self.csc.indices[entries], minlength=self.getNumUsers())
+    
+    
+    
+    '''getUserMeans() method'''
+    def getUserMeans(self):
+        ''' returns an array with the average rating of every user'''
+        counts = numpy.diff(self.csr.indptr)
+        rows = numpy.repeat(numpy.arange(len(counts)), counts)
+        sums = numpy.bincount(rows, weights=self.csr.data, minlength=len(counts))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            return sums / counts
+    
+    
+    
+    '''getItemMeans() method'''
+    def getItemMeans(self):
+        ''' returns an array with the average rating of every item'''
+        counts = numpy.diff(self.csc.indptr)
+        columns = numpy.repeat(numpy.arange(len(counts)), counts)
+        sums = numpy.bincount(columns, weights=self.csc.data, minlength=len(counts))
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            return sums / counts
+    
+    
+    
+    '''setUserRatings() method'''
+    def setUserRatings(self, user, ratings):
+        ''' replaces the ratings of user by the {item: rating} dict ratings'''
+        ''' unknown users and items are added with the next free dense ids'''
+        return self.setUsersRatings({user: ratings})[0]
+    
+    
+    
+    '''setUsersRatings() method'''
+    def setUsersRatings(self, rows):
+        ''' replaces the ratings of every user of the {user: {item: rating}} dict rows'''
+        ''' in one update of the arrays, returns the dense ids of the users'''
+        ''' unknown users and items are added with the next free dense ids'''
+        for (user, ratings) in rows.items():
+            for item in ratings:
+                if item not in self.itemIndex:
+                    self.itemIndex[item] = len(self.items)
+                    self.items.append(item)
+            if user not in self.userIndex:
+                self.userIndex[user] = len(self.users)
+                self.users.append(user)
+        
+        uids = [self.userIndex[user] for user in rows]
+        itemIds = [numpy.array([self.itemIndex[item] for item in ratings], dtype=numpy.int64)
+                   for ratings in rows.values()]
+        values = [numpy.array(list(ratings.values()), dtype=numpy.float32) for ratings in rows.values()]
+        self.setUserRows(uids, itemIds, values)
+        return uids
+    
+    
+    
+    '''setUserRow() method'''
+    def setUserRow(self, uid, itemIds, values):
+        ''' replaces row uid of the CSR arrays and the entries of uid in the CSC arrays'''
+        self.setUserRows([uid], [itemIds], [values])
+    
+    
+    
+    '''setUserRows() method'''
+    def setUserRows(self, uids, itemIds, values):
+        ''' replaces the rows uids of the CSR arrays, itemIds and values hold an array'''
+        ''' per row, and the entries of those users in the columns of the CSC arrays'''
+        ''' new ratings for the items a user already rated are written in place; rows'''
+        ''' that gain or lose items are spliced in, with one copy of each array and'''
+        ''' no sorting however many rows change'''
+        (csr, csc) = (self.csr, self.csc)
+        (numUsers, numItems) = (len(self.users), len(self.items))
+        # the arrays before the change, over the users and items added since
+        csrIndptr = numpy.concatenate((csr.indptr, numpy.repeat(csr.indptr[-1], numUsers + 1 - len(csr.indptr))))
+        cscIndptr = numpy.concatenate((csc.indptr, numpy.repeat(csc.indptr[-1], numItems + 1 - len(csc.indptr))))
+        
+        rows = {}
+        for (uid, ids, row) in zip(uids, itemIds, values):
+            ids = numpy.asarray(ids, dtype=numpy.int64)
+            order = numpy.argsort(ids)
+            rows[uid] = (ids[order], numpy.asarray(row, dtype=numpy.float32)[order])
+        changed = sorted(rows)
+        if not changed:
+            return
+        
+        # the old entries of the changed users, by position in the CSR and CSC arrays
+        oldItems = [csr.indices[csrIndptr[uid]:csrIndptr[uid + 1]] for uid in changed]
+        csrCut = [numpy.arange(csrIndptr[uid], csrIndptr[uid + 1]) for uid in changed]
+        cscCut = [self._columnPositions(csc.indices, cscIndptr, items, uid)
+                  for (uid, items) in zip(changed, oldItems)]
+        
+        # the same items rated again: no entry moves (a mapped snapshot is read-only)
+        inPlace = csr.shape == (numUsers, numItems) and csr.data.flags.writeable and \
+            csc.data.flags.writeable and \
+            all(numpy.array_equal(items, rows[uid][0]) for (uid, items) in zip(changed, oldItems))
+        if inPlace:
+            for (uid, positions, columnPositions) in zip(changed, csrCut, cscCut):
+                csr.data[positions] = rows[uid][1]
+                csc.data[columnPositions] = rows[uid][1]
+            self.version += 1
+            self.edit = (self.version, None, (numpy.concatenate(csrCut), numpy.concatenate(cscCut)))
+            return
+        
+        # a changed row goes where the old one was; in the columns only the entries of
+        # the items a user stopped rating are cut and those of the items it started
+        # rating put in, before the first user after it, in the order of items and users
+        csrPut = numpy.concatenate([numpy.repeat(csrIndptr[uid + 1], len(rows[uid][0])) for uid in changed])
+        csrItems = numpy.concatenate([rows[uid][0] for uid in changed])
+        csrValues = numpy.concatenate([rows[uid][1] for uid in changed])
+        kept = [numpy.in1d(items, rows[uid][0], assume_unique=True) for (uid, items) in zip(changed, oldItems)]
+        added = [numpy.setdiff1d(rows[uid][0], items, assume_unique=True) for (uid, items) in zip(changed, oldItems)]
+        cscPut = numpy.concatenate([self._columnPositions(csc.indices, cscIndptr, items, uid)
+                                    for (uid, items) in zip(changed, added)])
+        putItems = numpy.concatenate(added)
+        putUsers = numpy.concatenate([numpy.repeat(uid, len(items)) for (uid, items) in zip(changed, added)])
+        order = numpy.lexsort((putUsers, putItems, cscPut))
+        csrCut = numpy.concatenate(csrCut)
+        cscCut = numpy.sort(numpy.concatenate([positions[~keep] for (positions, keep) in zip(cscCut, kept)]))
+        plans = (self._splicePlan(csrCut, csrPut, csr.nnz), self._splicePlan(cscCut, cscPut[order], csc.nnz))
+        
+        userCounts = numpy.zeros(numUsers, dtype=numpy.int64)
+        userCounts[changed] = [len(rows[uid][0]) - len(items) for (uid, items) in zip(changed, oldItems)]
+        itemCounts = numpy.bincount(putItems, minlength=numItems)
+        itemCounts -= numpy.bincount(numpy.concatenate([items[~keep] for (items, keep) in zip(oldItems, kept)]),
+                                     minlength=numItems)
+        csrIndptr = (csrIndptr + numpy.concatenate(([0], numpy.cumsum(userCounts)))).astype(csr.indptr.dtype)
+        cscIndptr = (cscIndptr + numpy.concatenate(([0], numpy.cumsum(itemCounts)))).astype(csc.indptr.dtype)
+        
+        shape = (numUsers, numItems)
+        columnData = self._splice(csc.data, plans[1], numpy.zeros(len(putItems), dtype=csc.data.dtype))
+        self.csr = scipy.sparse.csr_matrix((self._splice(csr.data, plans[0], csrValues),
+                                            self._splice(csr.indices, plans[0], csrItems), csrIndptr),
+                                           shape=shape, copy=False)
+        self.csc = scipy.sparse.csc_matrix((columnData, self._splice(csc.indices, plans[1], putUsers[order]),
+                                            cscIndptr), shape=shape, copy=False)
+        self.csr.has_sorted_indices = True
+        self.csc.has_sorted_indices = True
+        
+        # the entries of the changed users in the new arrays, their ratings written there
+        csrTouched = numpy.concatenate([numpy.arange(csrIndptr[uid], csrIndptr[uid + 1]) for uid in changed])
+        cscTouched = numpy.concatenate([self._columnPositions(self.csc.indices, cscIndptr, rows[uid][0], uid)
+                                        for uid in changed])
+        self.csc.data[cscTouched] = csrValues
+        self.version += 1
+        self.edit = (self.version, plans, (csrTouched, cscTouched))
+    
+    
+    
+    '''_columnPositions() method'''
+    @staticmethod
+    def _columnPositions(indices, indptr, iids, uid):
+        ''' returns the positions of the CSC arrays where user uid is, or would go, in'''
+        ''' each column iids'''
+        positions = numpy.empty(len(iids), dtype=numpy.int64)
+        for (n, iid) in enumerate(iids.tolist()):
+            (start, end) = (indptr[iid], indptr[iid + 1])
+            positions[n] = start + numpy.searchsorted(indices[start:end], uid)
+        return positions
+    
+    
+    
+    '''_splicePlan() method'''
+    @staticmethod
+    def _splicePlan(cut, put, length):
+        ''' returns the pieces (fromOld, start, end) that make up an array of length'''
+        ''' entries without the sorted positions cut and with new entries put before the'''
+        ''' sorted positions put: ranges of the old array and of the new entries'''
+        events = []
+        if len(cut):
+            # runs of consecutive positions are cut at once
+            breaks = numpy.flatnonzero(numpy.diff(cut) != 1) + 1
+            starts = cut[numpy.concatenate(([0], breaks))]
+            ends = cut[numpy.concatenate((breaks - 1, [len(cut) - 1]))] + 1
+            events += [(start, 1, start, end) for (start, end) in zip(starts.tolist(), ends.tolist())]
+        if len(put):
+            (positions, firsts) = numpy.unique(put, return_index=True)
+            lasts = numpy.concatenate((firsts[1:], [len(put)]))
+            events += [(position, 0, first, last)
+                       for (position, first, last) in zip(positions.tolist(), firsts.tolist(), lasts.tolist())]
+        
+        plan = []
+        position = 0    # the next old entry to keep
+        for (at, cutting, start, end) in sorted(events):
+            if at > position:
+                plan.append((True, position, at))
+                position = at
+            if cutting:
+                position = end
+            else:
+                plan.append((False, start, end))
+        plan.append((True, position, length))
+        return plan
+    
+    
+    
+    '''_splice() method'''
+    @staticmethod
+    def _splice(array, plan, new, out=None):
+        ''' returns the array plan makes of the old array and the new entries, written'''
+        ''' to out if given'''
+        if out is None:
+            out = numpy.empty(sum(end - start for (fromOld, start, end) in plan), dtype=array.dtype)
+        position = 0
+        for (fromOld, start, end) in plan:
+            out[position:position + end - start] = (array if fromOld else new)[start:end]
+            position += end - start
+        return out
+    
+    
+    
+    '''spliceArray() method'''
+    def spliceArray(self, side, array, allocate=numpy.empty):
+        ''' returns array, laid out like the CSR (side 0) or CSC (side 1) data before the'''
+        ''' last setUserRows(), laid out like it after; the entries of the changed users'''
+        ''' are left at 0, see self.edit for their positions'''
+        ''' allocate(n) returns the array that holds the n entries'''
+        plan = self.edit[1][side]
+        new = numpy.zeros(sum(end - start for (fromOld, start, end) in plan if not fromOld), dtype=array.dtype)
+        out = allocate(sum(end - start for (fromOld, start, end) in plan))
+        return self._splice(array, plan, new, out)
+    
+    
+    
+    '''getNumUsers() method'''
+    def getNumUsers(self):
+        return len(self.users)
+    
+    
+    
+    '''getNumItems() method'''
+    def getNumItems(self):
+        return len(self.items)
+    
+    
+    
+    '''getNumRatings() method'''
+    def getNumRatings(self):
+        return self.csr.nnz
+    
+    
+    
+    '''getNumBytes() method'''
+    def getNumBytes(self):
+        ''' returns the number of bytes held by the CSR and CSC arrays'''
+        total = 0
+        for m in (self.csr, self.csc):
+            total += m.data.nbytes + m.indices.nbytes + m.indptr.nbytes
+        return total
+    
+    
+    
+    '''getFingerprint() method'''
+    def getFingerprint(self, blockSize=1 << 22):
+        ''' returns a string that identifies the ratings and the dense ids of the matrix:'''
+        ''' the number of ratings and a checksum of the user and item keys, in id order,'''
+        ''' and of the CSR arrays; files derived from the matrix are reused only while'''
+        ''' it is unchanged'''
+        digest = hashlib.sha1()
+        digest.update(repr(self.users).encode('utf-8'))
+        digest.update(repr(self.items).encode('utf-8'))
+        # a block at a time, the arrays may be mapped from disk
+        for array in (self.csr.indptr, self.csr.indices, self.csr.data):
+            for start in range(0, len(array), blockSize):
+                digest.update(numpy.ascontiguousarray(array[start:start + blockSize]).tostring())
+        return '%d-%s' % (self.getNumRatings(), digest.hexdigest())
+    
+    
+    
+    '''save() method'''
+    def save(self, path):
+        ''' writes the matrix to the snapshot directory path, one .npy file per array'''
+        ''' the arrays are stored raw so that load() can memory-map them'''
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        for (name, m) in (('csr', self.csr), ('csc', self.csc)):
+            numpy.save(os.path.join(path, name + '_data.npy'), m.data)
+            numpy.save(os.path.join(path, name + '_indices.npy'), m.indices)
+            numpy.save(os.path.join(path, name + '_indptr.npy'), m.indptr)
+        # the keys are Python objects (strings, None), they are small and pickled
+        for (name, keys) in (('users', self.users), ('items', self.items)):
+            objects = numpy.empty(len(keys), dtype=object)
+            objects[:] = keys
+            numpy.save(os.path.join(path, name + '.npy'), objects)
+    
+    
+    
+    '''load() method'''
+    @classmethod
+    def load(cls, path, mmap=False):
+        ''' opens a matrix written by save(); mmap=True maps the rating arrays read-only'''
+        ''' instead of reading them, so processes opening the same snapshot share them'''
+        mode = 'r' if mmap else None
+        def array(name):
+            return numpy.load(os.path.join(path, name + '.npy'), mmap_mode=mode)
+        
+        matrix = cls.__new__(cls)
+        matrix.users = numpy.load(os.path.join(path, 'users.npy'), allow_pickle=True).tolist()
+        matrix.items = numpy.load(os.path.join(path, 'items.npy'), allow_pickle=True).tolist()
+        matrix.userIndex = dict((user, uid) for (uid, user) in enumerate(matrix.users))
+        matrix.itemIndex = dict((item, iid) for (iid, item) in enumerate(matrix.items))
+        
+        shape = (len(matrix.users), len(matrix.items))
+        matrix.csr = scipy.sparse.csr_matrix((array('csr_data'), array('csr_indices'), array('csr_indptr')),
+                                             shape=shape, copy=False)
+        matrix.csc = scipy.sparse.csc_matrix((array('csc_data'), array('csc_indices'), array('csc_indptr')),
+                                             shape=shape, copy=False)
+        matrix.csr.has_sorted_indices = True
+        matrix.csc.has_sorted_indices = True
+        (matrix.version, matrix.edit) = (0, None)
+        return matrix
+    
+    
+    
+    '''toDict() method'''
+    def toDict(self):
+        ''' returns a detached dict of dicts copy of the ratings'''
+        ratings = {}
+        for (uid, user) in enumerate(self.users):
+            (indices, data) = self.getUserRow(uid)
+            ratings[user] = dict(zip([self.items[iid] for iid in indices], data.tolist()))
+        return ratings
+
+
+
+''' A read-only dict of dicts view {user: {item: rating}} of a RatingMatrix '''
+class RatingsView(Mapping):
+    
+    '''constructor'''
+    def __init__(self, matrix):
+        self.matrix = matrix
+    
+    def __getitem__(self, user):
+        return RowView(self.matrix, self.matrix.userIndex[user])
+    
+    def __contains__(self, user):
+        return user in self.matrix.userIndex
+    
+    def __iter__(self):
+        return iter(self.matrix.users)
+    
+    def __len__(self):
+        return len(self.matrix.users)
+    
+    def __deepcopy__(self, memo):
+        # a deep copy is a plain dict of dicts that can be edited freely
+        return self.matrix.toDict()
+    
+    
+    
+    '''corated() method'''
+    def corated(self, person1, person2):
+        ''' returns the ratings of the items both persons rated as two parallel lists'''
+        index = self.matrix.userIndex
+        (values1, values2) = self.matrix.getCorated(index[person1], index[person2])
+        return (values1.tolist(), values2.tolist())
+    
+    
+    
+    '''average() method'''
+    def average(self, person):
+        ''' returns the average rating of person'''
+        (indices, data) = self.matrix.getUserRow(self.matrix.userIndex[person])
+        return float(data.sum(dtype=numpy.float64)) / len(data)
+
+
+
+''' A read-only dict view {item: rating} of one row of a RatingMatrix '''
+class RowView(Mapping):
+    
+    '''constructor'''
+    def __init__(self, matrix, uid):
+        self.matrix = matrix
+        self.uid = uid
+    
+    def __getitem__(self, item):
+        iid = self.matrix.itemIndex.get(item)
+        rating = None if iid is None else self.matrix.getRating(self.uid, iid)
+        if rating is None:
+            raise KeyError(item)
+        return rating
+    
+    def __contains__(self, item):
+        iid = self.matrix.itemIndex.get(item)
+        return iid is not None and self.matrix.getRating(self.uid, iid) is not None
+    
+    def __iter__(self):
+        items = self.matrix.items
+        return (items[iid] for iid in self.matrix.getUserRow(self.uid)[0])
+    
+    def __len__(self):
+        return int(self.matrix.csr.indptr[self.uid + 1] - self.matrix.csr.indptr[self.uid])
+    
+    def items(self):
+        (indices, data) = self.matrix.getUserRow(self.uid)
+        return list(zip([self.matrix.items[iid] for iid in indices], data.tolist()))
+    
+    def values(self):
+        return self.matrix.getUserRow(self.uid)[1].tolist()
+    
+    
+    
+    ''' ******* The End ******'''
@@ -10,8 +10,35 @@ This file implements the Recomender class.
 
 from __future__ import print_function
 import math
+import multiprocessing
+import os
 import random
+import sys
+import numpy
+import functions.fileio
+import functions.loader
 import functions.similarity
+import functions.storage
+import factorization
+import instrumentation
+import lrucache
+import lsh
+import ratingmatrix
+import neighbourindex
+import userstats
+
+
+
+# the Recommender forked worker processes read from, see predictBatch()
+_shared = None
+
+
+
+'''_predictShard() function'''
+def _predictShard(task):
+    ''' runs in a worker process: predicts a shard of [(person, items)] work'''
+    (shard, similarity, n, formula) = task
+    return [_shared.predictItems(person, items, similarity, n, formula) for (person, items) in shard]
 
 
 
@@ -19,13 +46,52 @@ import functions.similarity
 class Recommender(object):
     
     '''constructor'''
-    def __init__(self, ratingsFile=None, moviesFile=None,loadFromFiles=True, ratings={}):
+    def __init__(self, ratingsFile=None, moviesFile=None,loadFromFiles=True, ratings={}, backend='dict',
+                 snapshot=None, mmap=False, matrix=None, instrument=None):
         ''' define ratings dict and movies dict'''
         ''' loadData() loads data from two files and initialise the two dicts'''
+        ''' backend='sparse' keeps the ratings in a compact RatingMatrix and'''
+        ''' makes self.ratings a read-only dict of dicts view of it'''
+        ''' snapshot is a directory written by saveSnapshot() to open instead of the'''
+        ''' files, mmap=True memory-maps its rating arrays and keeps the similarity'''
+        ''' matrices and neighbour indexes in memory-mapped files next to them, so'''
+        ''' that ratings and indexes larger than RAM are paged in from disk on use'''
+        ''' matrix is a RatingMatrix to use as is, self.ratings becomes a view of it'''
+        ''' instrument is an Instrument to record the stages into from the start, the'''
+        ''' loading of the data included, see setInstrument()'''
+        if backend not in ('dict', 'sparse'):
+            raise ValueError("unknown backend: %r" % (backend,))
+        self.backend = backend
         self.ratings = {}
         self.movies = {}
-        if loadFromFiles:
-            self.loadData(ratingsFile, moviesFile)
+        self.titleIndex = {}    # title -> movie ids, ratings are keyed by movie id
+        self.matrix = None
+        self.stats = None       # cached per-user rating statistics (UserStats)
+        self.similarities = {}  # precomputed user x user scores {similarity: array}
+        self.neighbourIndexes = {}  # top-k neighbour lists {similarity: NeighbourIndex}
+        self.maxNeighbours = 300    # neighbours kept per user by the indexes
+        self.minCorated = 1     # fewest co-rated items two users need to be neighbours
+        self.significance = None    # co-rated items below which similarities are shrunk
+        self.itemIndexes = {}   # top-k item x item tables {item similarity: NeighbourIndex}
+        self.maxItemNeighbours = 50     # neighbours kept per item by the tables
+        self.approximate = None     # LSHIndex parameters of approximate neighbourhoods
+        self.lshIndex = None        # the LSHIndex of approximate neighbourhoods
+        self.cache = None           # LRUCache of neighbourhoods and predictions, see setCache()
+        self.engine = 'neighbours'  # what predictions are made with, see setEngine()
+        self.engineParams = {}      # Factorization parameters of the 'factors' engine
+        self.model = None           # the trained Factorization of the 'factors' engine
+        self.storage = snapshot if mmap else None   # directory of the memory-mapped files
+        self.fingerprint = None     # RatingMatrix fingerprint the stored files must match
+        self.modified = False   # ratings changed since they were loaded
+        self.instrument = instrument    # Instrument of stage timers and counters, see setInstrument()
+        if matrix is not None:
+            self.setMatrix(matrix)
+        elif snapshot is not None:
+            instrumentation.timed(self.instrument, 'load', self.loadSnapshot, snapshot, mmap)
+        elif loadFromFiles:
+            instrumentation.timed(self.instrument, 'load', self.loadData, ratingsFile, moviesFile)
+        elif backend == 'sparse':
+            self.setMatrix(ratingmatrix.RatingMatrix.fromDict(ratings))
         else :
             self.ratings = ratings
     
@@ -37,18 +103,641 @@ class Recommender(object):
         ''' store data in movies and ratings dicts'''
         # keep the dictionary structure in mind
         ''' load movies'''
-        for line in open(moviesFile):
-            movieList = line.split('|')
-            movieid = movieList[0]
-            moviename = movieList[1]
-            # both of the following do the same thing
-            #self.movies.setdefault(movieid, moviename)
-            self.movies[movieid] = moviename
+        self.setMovies(functions.loader.load_movies(moviesFile))
         ''' load ratings'''
-        for line in open(ratingsFile):
-            (user, movieid, rating, timestamp) = line.split('\t')
-            self.ratings.setdefault(user, {})
-            self.ratings[user][self.movies.get(movieid)] = float(rating)
+        # the file is parsed into arrays in bulk, then users and movies are
+        # mapped to dense ids; ratings are keyed by movie id, not by title
+        (users, movieids, values) = functions.loader.load_ratings(ratingsFile)
+        self.loadArrays(users, movieids, values)
+    
+    
+    
+    '''loadArrays() method'''
+    def loadArrays(self, users, movieids, values):
+        ''' stores the ratings of parallel arrays of user ids, movie ids and ratings'''
+        ''' as loadData() does those of a ratings file'''
+        (userKeys, userIds) = numpy.unique(users, return_inverse=True)
+        (movieKeys, itemIds) = numpy.unique(movieids, return_inverse=True)
+        users = [str(user) for user in userKeys.tolist()]
+        items = [functions.loader.movie_key(movieid) for movieid in movieKeys.tolist()]
+        
+        if self.backend == 'sparse':
+            self.setMatrix(ratingmatrix.RatingMatrix.fromIds(users, items, userIds, itemIds, values))
+            return
+        
+        for (uid, iid, rating) in zip(userIds.tolist(), itemIds.tolist(), values.tolist()):
+            self.ratings.setdefault(users[uid], {})
+            self.ratings[users[uid]][items[iid]] = rating
+    
+    
+    
+    '''saveSnapshot() method'''
+    def saveSnapshot(self, path):
+        ''' writes the ratings and movies to the snapshot directory path'''
+        ''' Recommender(snapshot=path) opens it again without parsing any text'''
+        ''' matrices and indexes stored there for the ratings it held before are deleted'''
+        for name in os.listdir(path) if os.path.isdir(path) else []:
+            if name.startswith(('similarity_', 'index_', 'items_index_')) and name.endswith('.npy'):
+                functions.storage.remove_array(os.path.join(path, name))
+        self.getMatrix().save(path)
+        movieIds = sorted(self.movies)
+        for (name, keys) in (('movies_ids', movieIds), ('movies_titles', [self.movies[m] for m in movieIds])):
+            objects = numpy.empty(len(keys), dtype=object)
+            objects[:] = keys
+            numpy.save(os.path.join(path, name + '.npy'), objects)
+    
+    
+    
+    '''loadSnapshot() method'''
+    def loadSnapshot(self, path, mmap=False):
+        ''' opens a snapshot written by saveSnapshot(); mmap=True maps the rating'''
+        ''' arrays instead of reading them, processes opening it share one copy'''
+        movieIds = numpy.load(os.path.join(path, 'movies_ids.npy'), allow_pickle=True).tolist()
+        titles = numpy.load(os.path.join(path, 'movies_titles.npy'), allow_pickle=True).tolist()
+        self.setMovies(dict(zip(movieIds, titles)))
+        matrix = ratingmatrix.RatingMatrix.load(path, mmap)
+        if self.backend == 'sparse':
+            self.setMatrix(matrix)
+        else:
+            # the matrix keeps the dense ids of the snapshot, those of the stored files
+            self.ratings = matrix.toDict()
+            self.matrix = matrix
+    
+    
+    
+    '''setMovies() method'''
+    def setMovies(self, movies):
+        ''' sets the {movieid: moviename} dict and the title -> movie ids index'''
+        self.movies = movies
+        self.titleIndex = {}
+        for movieid in sorted(movies, key=functions.loader.movie_key):
+            self.titleIndex.setdefault(movies[movieid], []).append(functions.loader.movie_key(movieid))
+    
+    
+    
+    '''getItemId() method'''
+    def getItemId(self, item):
+        ''' returns the movie id ratings are keyed by for item, a title or a movie id'''
+        ''' (a number or its string); a title shared by several movies stands for the'''
+        ''' one with the most ratings'''
+        movieIds = self.titleIndex.get(item)
+        if movieIds is None:
+            return functions.loader.movie_key(item)
+        if len(movieIds) == 1:
+            return movieIds[0]
+        
+        matrix = self.getMatrix()
+        def numRatings(movieId):
+            iid = matrix.itemIndex.get(movieId)
+            return 0 if iid is None else int(matrix.csc.indptr[iid + 1] - matrix.csc.indptr[iid])
+        return max(movieIds, key=numRatings)
+    
+    
+    
+    '''getTitle() method'''
+    def getTitle(self, item):
+        ''' returns the title of the movie id item, or the id as a string if it has none'''
+        return self.movies.get(str(item), str(item))
+    
+    
+    
+    '''setMatrix() method'''
+    def setMatrix(self, matrix):
+        ''' uses matrix as the ratings store, self.ratings becomes a view of it'''
+        self.matrix = matrix
+        self.ratings = ratingmatrix.RatingsView(matrix)
+        self.fingerprint = None
+    
+    
+    
+    '''getMatrix() method'''
+    def getMatrix(self):
+        ''' returns the RatingMatrix of the ratings, building it from the dict backend once'''
+        if self.matrix is None:
+            self.matrix = ratingmatrix.RatingMatrix.fromDict(self.ratings)
+        return self.matrix
+    
+    
+    
+    '''getStats() method'''
+    def getStats(self):
+        ''' returns the per-user rating statistics cache, building it on first use'''
+        if self.stats is None:
+            self.stats = instrumentation.timed(self.instrument, 'stats', userstats.UserStats, self.getMatrix(),
+                                               self.storage)
+        return self.stats
+    
+    
+    
+    '''buildSimilarities() method'''
+    def buildSimilarities(self, similarity=functions.similarity.weighted_similarity, blockSize=None):
+        ''' computes the full user x user matrix of a similarity function in one vectorized'''
+        ''' pass, block of rows by block of rows, and stores it for getNeighbourhood()'''
+        ''' in the memory-mapped storage mode the matrix is written to a file instead'''
+        ''' a function without a vectorized version is called for every pair of users'''
+        matrixSimilarity = functions.similarity.matrix_similarity(similarity)
+        if matrixSimilarity is None:
+            matrixSimilarity = self._pairwiseRows(similarity)
+        
+        matrix = self.getMatrix()
+        numUsers = matrix.getNumUsers()
+        path = self._storagePath('similarity_' + similarity.__name__)
+        if path is not None:
+            scores = functions.storage.create_array(path + '.npy', (numUsers, numUsers))
+        else:
+            scores = functions.storage.scratch_array(self.storage, (numUsers, numUsers))
+        
+        blockSize = blockSize or self._blockSize(numUsers)
+        for start in range(0, numUsers, blockSize):
+            rows = numpy.arange(start, min(start + blockSize, numUsers))
+            scores[rows] = matrixSimilarity(matrix, rows, self.getStats())
+        
+        if path is not None:
+            scores = functions.storage.publish_array(path + '.npy', scores, self._storageFingerprint())
+        self.similarities[similarity] = scores
+        return scores
+    
+    
+    
+    '''getSimilarities() method'''
+    def getSimilarities(self, similarity):
+        ''' returns the stored user x user matrix of similarity, building it on first use'''
+        ''' returns None for similarity functions without a vectorized version'''
+        if similarity not in self.similarities:
+            if functions.similarity.matrix_similarity(similarity) is None:
+                return None
+            # reuse a matrix stored next to the snapshot by an earlier run
+            path = self._storagePath('similarity_' + similarity.__name__)
+            if path is not None:
+                numUsers = self.getMatrix().getNumUsers()
+                scores = functions.storage.open_array(path + '.npy', (numUsers, numUsers), numpy.float64,
+                                                      self._storageFingerprint())
+                if scores is not None:
+                    self.similarities[similarity] = scores
+            if similarity not in self.similarities:
+                self.buildSimilarities(similarity)
+        return self.similarities[similarity]
+    
+    
+    
+    '''_pairwiseRows() method'''
+    def _pairwiseRows(self, similarity):
+        ''' returns a block scoring function like the vectorized ones that calls the'''
+        ''' pairwise similarity function once for every pair of users'''
+        def pairwiseRows(matrix, rows, stats):
+            # the six functions of functions.similarity read the statistics cache
+            extra = (stats,) if similarity in functions.similarity.SIMILARITIES else ()
+            scores = numpy.empty((len(rows), matrix.getNumUsers()))
+            for (row, uid) in enumerate(rows):
+                person = matrix.users[uid]
+                scores[row] = [similarity(self.ratings, person, other, *extra) for other in matrix.users]
+            return scores
+        return pairwiseRows
+    
+    
+    
+    '''_storagePath() method'''
+    def _storagePath(self, name):
+        ''' returns the path of the storage directory to keep name at, or None when'''
+        ''' there is no storage directory or the ratings no longer match the snapshot'''
+        if self.storage is None or self.modified:
+            return None
+        return os.path.join(self.storage, name)
+    
+    
+    
+    '''_storageFingerprint() method'''
+    def _storageFingerprint(self):
+        ''' returns the fingerprint of the ratings the files of the storage directory'''
+        ''' are computed from, see RatingMatrix.getFingerprint()'''
+        if self.fingerprint is None:
+            self.fingerprint = self.getMatrix().getFingerprint()
+        return self.fingerprint
+    
+    
+    
+    '''_indexFingerprint() method'''
+    def _indexFingerprint(self, k):
+        ''' returns the fingerprint of a stored neighbour index of k neighbours: that of'''
+        ''' the ratings and the settings of setMinCorated() and setSignificance()'''
+        return '%s k=%d minCorated=%d significance=%r' % (self._storageFingerprint(), k, self.minCorated,
+                                                           self.significance)
+    
+    
+    
+    '''_blockSize() method'''
+    def _blockSize(self, numUsers):
+        ''' returns how many users to score at a time: a block of score rows and the'''
+        ''' co-rated sums behind them stay within about 64MB'''
+        return int(max(1, min(1024, (1 << 26) // (48 * max(numUsers, 1)))))
+    
+    
+    
+    '''getNeighbourIndex() method'''
+    def getNeighbourIndex(self, similarity, n=None):
+        ''' returns the top-k neighbour index of similarity, building it on first use'''
+        ''' with k large enough for neighbourhoods of size n, or None for similarity'''
+        ''' functions without a vectorized version or a stored similarity matrix'''
+        if functions.similarity.matrix_similarity(similarity) is None and similarity not in self.similarities:
+            return None
+        
+        index = self.neighbourIndexes.get(similarity)
+        if index is None or (n is not None and n > index.k):
+            matrix = self.getMatrix()
+            numUsers = matrix.getNumUsers()
+            # users with equal scores are ranked by user key, as sorting (sim, user) does
+            tieBreak = numpy.empty(numUsers, dtype=numpy.int64)
+            tieBreak[sorted(range(numUsers), key=matrix.users.__getitem__)] = numpy.arange(numUsers)
+            k = max(n or 0, self.maxNeighbours)
+            path = self._storagePath('index_' + similarity.__name__)
+            index = instrumentation.timed(self.instrument, 'neighbourIndex', neighbourindex.NeighbourIndex,
+                                          self._scoreRows(similarity), numUsers, k=k, tieBreak=tieBreak,
+                                          blockSize=self._blockSize(numUsers), path=path,
+                                          fingerprint=None if path is None else self._indexFingerprint(k))
+            self.neighbourIndexes[similarity] = index
+            if self.instrument is not None:
+                self.instrument.count('similarities', numUsers * numUsers)
+        return index
+    
+    
+    
+    '''_scoreRows() method'''
+    def _scoreRows(self, similarity):
+        ''' returns a function that scores a block of users against every user'''
+        matrixSimilarity = functions.similarity.matrix_similarity(similarity)
+        def scoreRows(rows):
+            if similarity in self.similarities:
+                scores = self.similarities[similarity][rows]
+            else:
+                scores = matrixSimilarity(self.getMatrix(), rows, self.getStats())
+            if self.minCorated > 1 or self.significance is not None:
+                counts = functions.similarity.corated_counts(self.getMatrix(), rows, self.getStats())
+                scores = self._thresholdScores(scores, counts)
+            return scores
+        return scoreRows
+    
+    
+    
+    '''setCache() method'''
+    def setCache(self, maxSize=10000):
+        ''' caches the neighbourhoods of getNeighbourhood() and the predictions of'''
+        ''' getPrediction(), getPrediction1() and predictBatch(), keyed by person, item,'''
+        ''' similarity function and n, in an LRUCache of at most maxSize entries'''
+        ''' entries made stale by a rating change are dropped, see _invalidateCache()'''
+        ''' maxSize=None turns the cache off'''
+        self.cache = None if maxSize is None else lrucache.LRUCache(maxSize)
+    
+    
+    
+    '''clearCache() method'''
+    def clearCache(self):
+        ''' empties the cache of setCache(), if there is one'''
+        if self.cache is not None:
+            self.cache.clear()
+    
+    
+    
+    '''getCacheCounters() method'''
+    def getCacheCounters(self):
+        ''' returns the hits, misses, evictions and size of the cache as a dict'''
+        return None if self.cache is None else self.cache.getCounters()
+    
+    
+    
+    '''_cached() method'''
+    def _cached(self, key, person, similarity, compute, *args):
+        ''' returns compute(*args) through the cache of setCache(), stored under key'''
+        if self.cache is None:
+            return instrumentation.timed(self.instrument, key[0], compute, *args)
+        value = self.cache.get(key)
+        if value is None:
+            value = instrumentation.timed(self.instrument, key[0], compute, *args)
+            self.cache.put(key, value, (('user', person), ('similarity', similarity)))
+        return value
+    
+    
+    
+    '''_invalidateCache() method'''
+    def _invalidateCache(self, users):
+        ''' drops the cached results of users (dense ids) after a rating change, and'''
+        ''' all those of the similarities that no neighbour index keeps track of: a'''
+        ''' changed user may enter or leave any neighbourhood there'''
+        for uid in set(users):
+            self.cache.invalidate(('user', self.matrix.users[uid]))
+        tracked = self.neighbourIndexes if self.approximate is None else {}
+        for tag in list(self.cache.tagged):
+            if tag[0] == 'similarity' and tag[1] not in tracked:
+                self.cache.invalidate(tag)
+    
+    
+    
+    '''setInstrument() method'''
+    def setInstrument(self, enabled=True, profile=None):
+        ''' records per-stage timers and counters in an Instrument, returned; stages are'''
+        ''' 'load', 'stats', 'neighbourIndex', 'neighbourhood', 'resnick' and 'simple' (the'''
+        ''' predictions of getPrediction() and getPrediction1()), 'predictItems','''
+        ''' 'ratingsChanged', 'read', 'predict' and 'write' of testFromFile(), and 'split' and'''
+        ''' 'test' of Evaluate.evaluate()'''
+        ''' counters are 'similarities' (pairs of users scored), 'predictions','''
+        ''' 'neighbours' (neighbours available to them), 'neighboursUsed' (neighbour ratings'''
+        ''' of the items predicted) and 'coratedItems' (items co-rated with the neighbours)'''
+        ''' profile is a file to dump the cProfile statistics of the stages to'''
+        ''' enabled=False turns instrumentation off; the records of forked worker'''
+        ''' processes are not collected'''
+        self.instrument = instrumentation.Instrument(profile) if enabled else None
+        return self.instrument
+    
+    
+    
+    '''getInstrument() method'''
+    def getInstrument(self):
+        ''' returns the Instrument of setInstrument(), None when instrumentation is off'''
+        return self.instrument
+    
+    
+    
+    '''_countNeighbours() method'''
+    def _countNeighbours(self, person, others, used, predictions=1):
+        ''' records the counters of predictions for person made from the neighbours'''
+        ''' others (dense ids), of which used ratings were used'''
+        matrix = self.getMatrix()
+        others = numpy.asarray(others, dtype=numpy.int64)
+        corated = matrix.getCoratedCounts(matrix.userIndex[person])[others]
+        self.instrument.count('predictions', predictions)
+        self.instrument.count('neighbours', len(others) * predictions)
+        self.instrument.count('neighboursUsed', int(used))
+        self.instrument.count('coratedItems', int(corated.sum()) * predictions)
+    
+    
+    
+    '''setApproximate() method'''
+    def setApproximate(self, **params):
+        ''' finds neighbourhoods approximately: the candidates sharing a hash bucket'''
+        ''' with the user in an LSHIndex are scored exactly and the best are kept,'''
+        ''' rather than scoring every user; params are passed on to LSHIndex, e.g.'''
+        ''' tables=10, bits=8, probes=1, and trade the share of the true neighbours'''
+        ''' found for speed; no params turns exact neighbourhoods back on'''
+        ''' applies to the similarity functions that have a vectorized version'''
+        self.approximate = params or None
+        self.lshIndex = None
+        self.clearCache()
+    
+    
+    
+    '''getLSHIndex() method'''
+    def getLSHIndex(self):
+        ''' returns the LSHIndex of approximate neighbourhoods, building it on first use'''
+        if self.lshIndex is None:
+            self.lshIndex = lsh.LSHIndex(self.getStats(), **self.approximate)
+        return self.lshIndex
+    
+    
+    
+    '''getApproximateNeighbours() method'''
+    def getApproximateNeighbours(self, person, similarity, n):
+        ''' returns the approximate neighbourhood of person as arrays of dense user ids'''
+        ''' and scores, best first: the LSH candidates re-ranked by their exact scores'''
+        matrix = self.getMatrix()
+        uid = matrix.userIndex[person]
+        candidates = self.getLSHIndex().candidates(uid)
+        # candidates with too few co-rated items are dropped before they are scored
+        counts = matrix.getCoratedCounts(uid)[candidates]
+        keep = counts >= max(self.minCorated, 1)
+        (candidates, counts) = (candidates[keep], counts[keep])
+        if self.instrument is not None:
+            self.instrument.count('similarities', len(candidates))
+        if len(candidates) == 0:
+            return (candidates, numpy.zeros(0))
+        
+        rows = numpy.array([uid])
+        scores = functions.similarity.matrix_similarity(similarity)(matrix, rows, self.getStats(),
+                                                                    candidates)[0]
+        if self.significance is not None:
+            scores = self._thresholdScores(scores, counts)
+        # remove any negative similarity scores --> no correlation with user so don't use them
+        keep = scores > 0
+        (candidates, scores) = (candidates[keep], scores[keep])
+        
+        best = self._bestPositions(scores, n)
+        return (candidates[best], scores[best])
+    
+    
+    
+    '''setEngine() method'''
+    def setEngine(self, engine, **params):
+        ''' engine='neighbours' predicts from user neighbourhoods (the default),'''
+        ''' 'factors' from a latent factor model trained on the ratings matrix the first'''
+        ''' time it is needed; params are passed on to Factorization, e.g. factors=20'''
+        ''' getPrediction(), getPrediction1(), getRecommendations(), predictBatch() and'''
+        ''' so testFromFile() and Evaluate all use the engine set here'''
+        if engine not in ('neighbours', 'factors'):
+            raise ValueError("unknown engine: %r" % (engine,))
+        self.engine = engine
+        self.engineParams = params
+        self.model = None
+        self.clearCache()
+    
+    
+    
+    '''getModel() method'''
+    def getModel(self):
+        ''' returns the latent factor model of the 'factors' engine, training it on first use'''
+        if self.model is None:
+            self.model = factorization.Factorization(self.getMatrix(), **self.engineParams).train()
+        return self.model
+    
+    
+    
+    '''predictByFactors() method'''
+    def predictByFactors(self, person, items):
+        ''' returns the latent factor predictions of person for every item in the list'''
+        ''' items, -1 for unknown items and items person has already rated'''
+        matrix = self.getMatrix()
+        uid = matrix.userIndex[person]
+        items = [self.getItemId(item) for item in items]
+        predictions = [-1] * len(items)
+        
+        rated = matrix.getUserRow(uid)[0]
+        itemIds = numpy.array([matrix.itemIndex.get(item, -1) for item in items], dtype=numpy.int64)
+        wanted = numpy.flatnonzero((itemIds >= 0) & ~numpy.in1d(itemIds, rated))
+        if len(wanted):
+            scores = self.getModel().predict(uid, itemIds[wanted])
+            for (pos, score) in zip(wanted.tolist(), scores.tolist()):
+                predictions[pos] = score
+        return predictions
+    
+    
+    
+    '''setMinCorated() method'''
+    def setMinCorated(self, minCorated):
+        ''' sets the fewest co-rated items two users need to be neighbours'''
+        ''' the neighbour indexes are rebuilt on their next use'''
+        if minCorated != self.minCorated:
+            self.minCorated = minCorated
+            self.neighbourIndexes = {}
+            self.itemIndexes = {}
+            self.clearCache()
+    
+    
+    
+    '''setSignificance() method'''
+    def setSignificance(self, threshold=50):
+        ''' shrinks the similarity of two users who co-rated fewer than threshold items'''
+        ''' by count / threshold (significance weighting), so that a user sharing a single'''
+        ''' item no longer weighs as much as one sharing hundreds; the same applies to'''
+        ''' items and the users who rated both; threshold=None turns it off'''
+        ''' the neighbour indexes are rebuilt on their next use'''
+        if threshold is not None and threshold < 1:
+            raise ValueError("significance threshold must be at least 1: %r" % (threshold,))
+        if threshold != self.significance:
+            self.significance = threshold
+            self.neighbourIndexes = {}
+            self.itemIndexes = {}
+            self.clearCache()
+    
+    
+    
+    '''_thresholdScores() method'''
+    def _thresholdScores(self, scores, counts):
+        ''' returns the similarity scores with the co-rated counts counts weighted in:'''
+        ''' shrunk by setSignificance(), and -1 below the minimum of setMinCorated()'''
+        if self.significance is not None:
+            scores = scores * (numpy.minimum(counts, self.significance) / float(self.significance))
+        if self.minCorated > 1:
+            scores = numpy.where(counts < self.minCorated, -1, scores)
+        return scores
+    
+    
+    
+    '''addRating() method'''
+    def addRating(self, person, item, rating):
+        ''' adds (or replaces) the rating of person for item, a title or a movie id'''
+        ''' a new person is added; predictions see the rating right away'''
+        self.addRatings([(person, item, rating)])
+    
+    
+    
+    '''removeRating() method'''
+    def removeRating(self, person, item):
+        ''' removes the rating of person for item, a title or a movie id'''
+        item = self.getItemId(item)
+        if person not in self.ratings or item not in self.ratings[person]:
+            raise ValueError("no rating of %r for %r" % (person, item))
+        ratings = dict(self.ratings[person].items())
+        del ratings[item]
+        self.setRatings({person: ratings})
+    
+    
+    
+    '''addRatings() method'''
+    def addRatings(self, triples):
+        ''' adds (or replaces) a batch of (person, item, rating) ratings'''
+        ''' the ratings matrix is rebuilt once for the whole batch, then every person'''
+        ''' in it gets the incremental update of ratingsChanged()'''
+        rows = {}
+        for (person, item, rating) in triples:
+            if person not in rows:
+                rows[person] = dict(self.ratings[person].items()) if person in self.ratings else {}
+            rows[person][self.getItemId(item)] = float(rating)
+        self.setRatings(rows)
+    
+    
+    
+    '''setRatings() method'''
+    def setRatings(self, rows):
+        ''' replaces the ratings of every person of the {person: {item: rating}} dict rows'''
+        ''' and brings the precomputed structures up to date'''
+        self.modified = True
+        if not isinstance(self.ratings, ratingmatrix.RatingsView):
+            # the dict is the ratings store, the matrix (if built) follows it
+            self.ratings.update(rows)
+            if self.matrix is None:
+                self.clearCache()
+                return
+        changedItems = self._ratedItems(rows)
+        uids = self.getMatrix().setUsersRatings(rows)
+        changedItems.update(self._ratedItems(rows))
+        instrumentation.timed(self.instrument, 'ratingsChanged', self._usersChanged, uids, changedItems)
+    
+    
+    
+    '''ratingsChanged() method'''
+    def ratingsChanged(self, person):
+        ''' brings the precomputed structures up to date after the ratings of person'''
+        ''' changed: only the row of person is rescored and neighbour lists are patched'''
+        self.modified = True
+        if self.matrix is None:
+            self.clearCache()
+            return
+        # items whose similarities the change touches
+        changedItems = self._ratedItems([person])
+        if not isinstance(self.ratings, ratingmatrix.RatingsView):
+            self.matrix.setUserRatings(person, self.ratings.get(person, {}))
+        changedItems.update(self._ratedItems([person]))
+        instrumentation.timed(self.instrument, 'ratingsChanged', self._usersChanged, [self.matrix.userIndex[person]],
+                              changedItems)
+    
+    
+    
+    '''_ratedItems() method'''
+    def _ratedItems(self, persons):
+        ''' returns the set of the dense ids of the items rated by persons in the matrix'''
+        matrix = self.matrix
+        items = set()
+        for person in persons:
+            if person in matrix.userIndex:
+                items.update(matrix.getUserRow(matrix.userIndex[person])[0].tolist())
+        return items
+    
+    
+    
+    '''_usersChanged() method'''
+    def _usersChanged(self, uids, changedItems):
+        ''' updates the caches after the matrix rows of the users uids changed, the'''
+        ''' similarities of the dense item ids changedItems being affected'''
+        numUsers = self.matrix.getNumUsers()
+        if self.stats is not None:
+            for uid in uids:
+                self.stats.refresh(uid)
+        rows = numpy.array(uids, dtype=numpy.int64)
+        
+        for similarity in list(self.similarities):
+            scores = self.similarities[similarity]
+            if functions.similarity.matrix_similarity(similarity) is None:
+                # scored pair by pair: drop the matrix and the index read from it
+                del self.similarities[similarity]
+                self.neighbourIndexes.pop(similarity, None)
+                continue
+            if len(scores) != numUsers:
+                # a new user: drop the full matrix rather than reallocate it
+                del self.similarities[similarity]
+                continue
+            block = functions.similarity.matrix_similarity(similarity)(self.matrix, rows, self.getStats())
+            scores[rows, :] = block
+            scores[:, rows] = block.T
+        
+        # users whose neighbour lists changed
+        affected = list(uids)
+        for index in self.neighbourIndexes.values():
+            for uid in uids:
+                affected.extend(index.update(uid, numUsers).tolist())
+        
+        if self.lshIndex is not None:
+            for uid in uids:
+                self.lshIndex.update(uid)
+        
+        # the item factors stay, the factors of the users are refitted to the new ratings
+        if self.model is not None:
+            for uid in uids:
+                self.model.foldIn(uid)
+        
+        # item neighbourhoods are stable: only the lists of the items the users rated are
+        # recomputed (on their next use), the rest keep their scores until rebuilt
+        for index in self.itemIndexes.values():
+            index.invalidate(changedItems, self.matrix.getNumItems())
+        
+        if self.cache is not None:
+            self._invalidateCache(affected)
     
     
     
@@ -56,16 +745,54 @@ class Recommender(object):
     def getNeighbourhood(self, person, similarity, n=200):
         ''' returns the best matches for person from the ratings dictionary as a list'''
         ''' Number of results is optional params'''
+        return list(self._cached(('neighbourhood', person, similarity, n), person, similarity,
+                                 self._findNeighbourhood, person, similarity, n))
+    
+    
+    
+    '''_findNeighbourhood() method'''
+    def _findNeighbourhood(self, person, similarity, n):
+        ''' getNeighbourhood() without the cache'''
+        
+        # the approximate neighbourhood of setApproximate()
+        if self.approximate is not None and functions.similarity.matrix_similarity(similarity) is not None:
+            matrix = self.getMatrix()
+            (others, scores) = self.getApproximateNeighbours(person, similarity, n)
+            return list(zip(scores.tolist(), [matrix.users[other] for other in others]))
+        
+        # read the best matches from the top-k neighbour index when there is one
+        index = self.getNeighbourIndex(similarity, n)
+        if index is not None:
+            matrix = self.getMatrix()
+            (others, scores) = index.getNeighbours(matrix.userIndex[person], n)
+            return list(zip(scores.tolist(), [matrix.users[other] for other in others]))
         
         # return a similarity score list with person that looks like
         # scores = [(3.0, 'Mary'), (4.2, 'Tim'), ...] with person
         # similarity function is called here
-        scores = [(similarity(self.ratings, person, other), other) 
-                  for other in self.ratings if other != person]
+        # the six functions of functions.similarity read means and sorted item
+        # vectors from the statistics cache instead of recomputing them
+        # only users with enough co-rated items are scored: they are counted from the
+        # item -> users columns of the matrix, the others are never neighbours
+        matrix = self.getMatrix()
+        uid = matrix.userIndex[person]
+        counts = matrix.getCoratedCounts(uid)
+        counts[uid] = 0
+        candidates = numpy.flatnonzero(counts >= max(self.minCorated, 1))
+        others = [matrix.users[other] for other in candidates.tolist()]
+        if similarity in functions.similarity.SIMILARITIES:
+            stats = self.getStats()
+            scores = [similarity(self.ratings, person, other, stats) for other in others]
+        else:
+            scores = [similarity(self.ratings, person, other) for other in others]
+        if self.instrument is not None:
+            self.instrument.count('similarities', len(scores))
+        if self.significance is not None:
+            scores = self._thresholdScores(numpy.array(scores, dtype=numpy.float64), counts[candidates]).tolist()
         
         # remove any negative similarity scores --> no correlation with user so don't use them
         bestMatches = [(sim, user)
-                       for (sim, user) in scores if sim>0]
+                       for (sim, user) in zip(scores, others) if sim>0]
         
         # rank numbers from low to high
         bestMatches.sort()
@@ -80,38 +807,49 @@ class Recommender(object):
     '''getRecommendations() method'''
     def getRecommendations(self, person, similarity=functions.similarity.weighted_similarity):
         ''' gets recommendations for a person by using a weighted average of neighbourhood ratings'''
-
+        ''' the 'factors' engine scores every item with one matrix-vector product instead'''
+        ''' an item x item similarity gives those of getItemRecommendations()'''
+        if self.engine == 'factors':
+            return self.getFactorRecommendations(person)
+        if similarity in functions.similarity.ITEM_SIMILARITIES:
+            return self.getItemRecommendations(person, similarity)
+        
+        # the sparse backend aggregates the neighbours' rating rows with matrix products
+        if self.backend == 'sparse':
+            predictions = self.getTopN(person, None, similarity)
+            predictions.sort()
+            predictions.reverse()
+            return predictions
+        
         totals={}         #dict to hold item and numerator
         simSums={}        #dict to hold item and denominator
-        ratingCount={}    #dict to hold item and rating count
         
         # similarity function is called inside getNeighbourhood() method
         bestMatches = self.getNeighbourhood(person, similarity)
         
+        personRatings = self.ratings[person]
+        
         # for sim, other in bestMatches: --> why this works?
         for (sim, other) in bestMatches:
             
-            for item in self.ratings[other]:
+            for (item, rating) in self.ratings[other].items():
                 
                 # only predict for items person hasn't seen yet
-                if item not in self.ratings[person] or self.ratings[person][item] == 0:
-
-                    #count up number of ratings for this item
-                    ratingCount.setdefault(item, 0)
-                    ratingCount[item] += 1
-
+                if item not in personRatings or personRatings[item] == 0:
+                    
                     # Similarity * Score - accumulate into numerator
                     totals.setdefault(item,0)
-                    totals[item] += self.ratings[other][item] * sim
-
+                    totals[item] += rating * sim
+                    
                     # Sum of similarities - accumulate into denominator
                     simSums.setdefault(item,0)
                     simSums[item] += math.fabs(sim)
-
+        
         predictions = []
         # Create the list of predictions for new items
+        # movie ids are turned back into titles here
         for item, total in totals.items():
-            predictions.append((total/simSums[item], item))
+            predictions.append((total/simSums[item], self.getTitle(item)))
         
         # Return the sorted list
         predictions.sort()
@@ -121,24 +859,98 @@ class Recommender(object):
     
     
     
+    '''getTopN() method'''
+    def getTopN(self, person, n=20, similarity=functions.similarity.weighted_similarity, size=200,
+                minSupport=1):
+        ''' returns the n best recommendations of getRecommendations() as a'''
+        ''' [(prediction, title)] list, best first'''
+        ''' size is the number of neighbours whose ratings are aggregated, items rated by'''
+        ''' fewer than minSupport of them are left out'''
+        ''' the neighbours' rating rows are aggregated in one pass over their entries and'''
+        ''' only the n best items are selected and sorted'''
+        if self.engine == 'factors':
+            return self.getFactorRecommendations(person, n)
+        if similarity in functions.similarity.ITEM_SIMILARITIES:
+            return self.getItemRecommendations(person, similarity)[:n]
+        
+        matrix = self.getMatrix()
+        uid = matrix.userIndex[person]
+        (others, sims) = self.getNeighbourArrays(person, similarity, size)
+        if len(others) == 0:
+            return []
+        
+        # numerators, denominators and number of ratings of every item, summed in
+        # neighbour order as getRecommendations() does
+        rows = matrix.csr[others]
+        weights = numpy.repeat(sims, numpy.diff(rows.indptr))
+        numItems = matrix.getNumItems()
+        totals = numpy.bincount(rows.indices, weights=rows.data * weights, minlength=numItems)
+        simSums = numpy.bincount(rows.indices, weights=numpy.abs(weights), minlength=numItems)
+        support = numpy.bincount(rows.indices, minlength=numItems)
+        
+        # only predict for items person hasn't seen yet
+        eligible = support >= max(minSupport, 1)
+        eligible[matrix.getUserRow(uid)[0]] = False
+        candidates = numpy.flatnonzero(eligible)
+        scores = totals[candidates] / simSums[candidates]
+        
+        return [(float(scores[pos]), self.getTitle(matrix.items[candidates[pos]]))
+                for pos in self._bestPositions(scores, n)]
+    
+    
+    
+    '''_bestPositions() method'''
+    def _bestPositions(self, scores, n=None):
+        ''' returns the positions of the (n) highest scores, highest first'''
+        ''' a partial selection picks the n best, only those get sorted'''
+        if n is not None and n < len(scores):
+            if n <= 0:
+                return numpy.zeros(0, dtype=numpy.int64)
+            positions = numpy.argpartition(-scores, n - 1)[:n]
+        else:
+            positions = numpy.arange(len(scores))
+        return positions[numpy.argsort(-scores[positions], kind='mergesort')]
+    
+    
+    
     '''1: getPrediction() method: simple prediction approach'''
-    def getPrediction1(self, person, item, similarity=functions.similarity.weighted_similarity):
+    def getPrediction1(self, person, item, similarity=functions.similarity.weighted_similarity, n=300):
         ''' get single prediction for given person and item, returns -1'''
         ''' if it cannot perform the prediction either as'''
         ''' the person has already rated the item'''
         ''' or there are not adequate ratings in matrix'''
+        item = self.getItemId(item)
+        return self._cached(('simple', person, item, similarity, n), person, similarity,
+                            self._computePrediction1, person, item, similarity, n)
+    
+    
+    
+    '''_computePrediction1() method'''
+    def _computePrediction1(self, person, item, similarity, n):
+        ''' getPrediction1() without the cache'''
+        if self.engine == 'factors':
+            return self.predictByFactors(person, [item])[0]
+        # an item x item similarity predicts from the items person rated, as predictBatch() does
+        if similarity in functions.similarity.ITEM_SIMILARITIES:
+            return self.predictByItems(person, [item], similarity, n, 'simple')[0]
+        # the sparse backend gathers the neighbours' ratings from the item column
+        if self.backend == 'sparse':
+            return self._predictItems(person, [item], similarity, n, 'simple')[0]
         
         total = 0
         simSum = 0
         ratingCount = 0
         
+        # item may be a title or a movie id
+        item = self.getItemId(item)
+        
         #check item not already rated by person - if so return -1
         if item in self.ratings.get(person):
             return -1
         
         # get neighbourhood
         # similarity function is called inside getNeighbourhood() method
-        bestMatches = self.getNeighbourhood(person, similarity, n = 300)
+        bestMatches = self.getNeighbourhood(person, similarity, n)
         
         for sim, other in bestMatches:
             if item in self.ratings[other]:
@@ -151,6 +963,10 @@ class Recommender(object):
                 # sum of similarities - accumulate into denominator
                 simSum += sim
                 
+        if self.instrument is not None:
+            self._countNeighbours(person, [self.getMatrix().userIndex[other] for (sim, other) in bestMatches],
+                                  ratingCount)
+        
         # calculate predictions for item, make sure there was at least 1 rating
         if ratingCount != 0:
             prediction = total / simSum
@@ -162,16 +978,36 @@ class Recommender(object):
     
     
     '''2: getPrediction() method: Resnick's Formula - improved prediction approach'''
-    def getPrediction(self, person, item, similarity=functions.similarity.weighted_similarity):
+    def getPrediction(self, person, item, similarity=functions.similarity.weighted_similarity, n=300):
         ''' get single prediction for given person and item, returns -1'''
         ''' if it cannot perform the prediction either as'''
         ''' the person has already rated the item'''
         ''' or there are not adequate ratings in matrix'''
+        item = self.getItemId(item)
+        return self._cached(('resnick', person, item, similarity, n), person, similarity,
+                            self._computePrediction, person, item, similarity, n)
+    
+    
+    
+    '''_computePrediction() method'''
+    def _computePrediction(self, person, item, similarity, n):
+        ''' getPrediction() without the cache'''
+        if self.engine == 'factors':
+            return self.predictByFactors(person, [item])[0]
+        # an item x item similarity predicts from the items person rated, as predictBatch() does
+        if similarity in functions.similarity.ITEM_SIMILARITIES:
+            return self.predictByItems(person, [item], similarity, n, 'resnick')[0]
+        # the sparse backend gathers the neighbours' ratings from the item column
+        if self.backend == 'sparse':
+            return self._predictItems(person, [item], similarity, n, 'resnick')[0]
         
         total = 0
         simSum = 0
         ratingCount = 0
         
+        # item may be a title or a movie id
+        item = self.getItemId(item)
+        
         # check item not already rated by person - if so return -1
         if item in self.ratings.get(person):
             return -1
@@ -179,17 +1015,18 @@ class Recommender(object):
         # calculate average rating for person: active user
         ''' do not use item because it is a parameter passed in '''
         ''' use all_item instead '''
-        avgRating1 = sum([self.ratings[person][all_item] for all_item in self.ratings[person]]) / len(self.ratings[person])
+        stats = self.getStats()
+        avgRating1 = stats.getMean(person)
         
         # get neighbourhood
         # similarity function is called inside getNeighbourhood() method
-        bestMatches = self.getNeighbourhood(person, similarity, n = 300)
+        bestMatches = self.getNeighbourhood(person, similarity, n)
         
         for sim, other in bestMatches:
             #calculate average rating for user j
             ''' do not use item because it is a parameter passed in '''
             ''' use all_item instead '''
-            avgRating2 = sum([self.ratings[other][all_item] for all_item in self.ratings[other]]) / len(self.ratings[other])
+            avgRating2 = stats.getMean(other)
             
             if item in self.ratings[other]:
                 # count up num of ratings for this item
@@ -201,6 +1038,10 @@ class Recommender(object):
                 # sum of similarities - accumulate into denominator
                 simSum += sim
                 
+        if self.instrument is not None:
+            self._countNeighbours(person, [self.getMatrix().userIndex[other] for (sim, other) in bestMatches],
+                                  ratingCount)
+        
         # calculate predictions for item, make sure there was at least 1 rating
         if ratingCount != 0:
             prediction = avgRating1 + total / simSum
@@ -211,25 +1052,415 @@ class Recommender(object):
     
     
     
+    '''predictBatch() method'''
+    def predictBatch(self, pairs, similarity=functions.similarity.weighted_similarity, n=300,
+                     formula='resnick', processes=None, pool=None):
+        ''' returns the predictions for a list of (person, item) pairs, in the same order'''
+        ''' an item may be a title or a movie id'''
+        ''' formula='resnick' gives the getPrediction() results, 'simple' those of'''
+        ''' getPrediction1(); -1 when a prediction cannot be made'''
+        ''' the pairs are grouped by person: each neighbourhood is looked up once and'''
+        ''' all the items asked for that person are scored with one matrix product'''
+        ''' processes > 1 shards the persons across a pool of forked worker processes,'''
+        ''' pool is one from _openPool() to use instead of forking a new one'''
+        if formula not in ('resnick', 'simple'):
+            raise ValueError("unknown formula: %r" % (formula,))
+        matrix = self.getMatrix()
+        
+        predictions = [-1] * len(pairs)
+        positions = {}      # person -> positions of its pairs
+        for (pos, (person, item)) in enumerate(pairs):
+            positions.setdefault(person, []).append(pos)
+        
+        # one unit of work per known person: (person, items asked for person)
+        persons = [person for person in positions if person in matrix.userIndex]
+        work = [(person, [pairs[pos][1] for pos in positions[person]]) for person in persons]
+        
+        if processes is not None and processes > 1 and len(work) > 1:
+            results = self._predictParallel(work, similarity, n, formula, processes, pool)
+        else:
+            results = [self.predictItems(person, items, similarity, n, formula) for (person, items) in work]
+        
+        for (person, scores) in zip(persons, results):
+            for (pos, score) in zip(positions[person], scores):
+                predictions[pos] = score
+        
+        return predictions
+    
+    
+    
+    '''_predictParallel() method'''
+    def _predictParallel(self, work, similarity, n, formula, processes, pool=None):
+        ''' predicts [(person, items)] work in a pool of forked worker processes'''
+        ''' the workers share this Recommender copy-on-write instead of receiving'''
+        ''' a pickled copy per task; results come back in the order of work'''
+        ''' pool is an open pool to reuse, otherwise one is forked for this call'''
+        # round-robin shards, a few per process to even out the load
+        numShards = min(len(work), processes * 4)
+        tasks = [(work[start::numShards], similarity, n, formula) for start in range(numShards)]
+        
+        ownPool = pool is None
+        if ownPool:
+            pool = self._openPool(similarity, n, processes)
+        try:
+            shardResults = pool.map(_predictShard, tasks)
+        finally:
+            if ownPool:
+                self._closePool(pool)
+        
+        # undo the round-robin interleaving
+        results = [None] * len(work)
+        for (start, shardResult) in enumerate(shardResults):
+            results[start::numShards] = shardResult
+        return results
+    
+    
+    
+    '''_openPool() method'''
+    def _openPool(self, similarity=functions.similarity.weighted_similarity, n=300, processes=None):
+        ''' forks a pool of worker processes for predictBatch(), processes of them, sharing this'''
+        ''' Recommender as it is now; close it with _closePool()'''
+        global _shared
+        
+        # build what the workers read before forking so they don't each build it
+        self.getStats().getParts()
+        if self.engine == 'factors':
+            self.getModel()
+        elif similarity in functions.similarity.ITEM_SIMILARITIES:
+            self.getItemIndex(similarity, n)
+        elif self.approximate is not None and functions.similarity.matrix_similarity(similarity) is not None:
+            self.getLSHIndex()
+        else:
+            self.getNeighbourIndex(similarity, n)
+        
+        # kept while the pool is open, workers that die are forked again
+        _shared = self
+        return multiprocessing.Pool(processes)
+    
+    
+    
+    '''_closePool() method'''
+    def _closePool(self, pool):
+        ''' waits for the workers of a pool from _openPool() to exit'''
+        global _shared
+        pool.close()
+        pool.join()
+        _shared = None
+    
+    
+    
+    '''predictItems() method'''
+    def predictItems(self, person, items, similarity=functions.similarity.weighted_similarity, n=300,
+                     formula='resnick'):
+        ''' returns the predictions of person for every item in the list items'''
+        ''' an item may be a title or a movie id'''
+        ''' an item x item similarity gives the item-based predictions of predictByItems()'''
+        ''' the 'factors' engine ignores similarity, n and formula, see predictByFactors()'''
+        if self.cache is None:
+            return instrumentation.timed(self.instrument, 'predictItems', self._predictItems, person, items,
+                                         similarity, n, formula)
+        
+        # only the items missing from the cache are predicted
+        keys = [('batch ' + formula, person, self.getItemId(item), similarity, n) for item in items]
+        predictions = [self.cache.get(key) for key in keys]
+        missing = [pos for (pos, prediction) in enumerate(predictions) if prediction is None]
+        if missing:
+            computed = instrumentation.timed(self.instrument, 'predictItems', self._predictItems, person,
+                                             [keys[pos][2] for pos in missing], similarity, n, formula)
+            tags = (('user', person), ('similarity', similarity))
+            for (pos, prediction) in zip(missing, computed):
+                predictions[pos] = prediction
+                self.cache.put(keys[pos], prediction, tags)
+        return predictions
+    
+    
+    
+    '''_predictItems() method'''
+    def _predictItems(self, person, items, similarity, n, formula):
+        ''' predictItems() without the cache'''
+        if self.engine == 'factors':
+            return self.predictByFactors(person, items)
+        if similarity in functions.similarity.ITEM_SIMILARITIES:
+            return self.predictByItems(person, items, similarity, n, formula)
+        
+        matrix = self.getMatrix()
+        stats = self.getStats()
+        uid = matrix.userIndex[person]
+        items = [self.getItemId(item) for item in items]
+        
+        # dense ids of the items, unknown items can't be predicted
+        known = numpy.array([item in matrix.itemIndex for item in items], dtype=bool)
+        itemIds = numpy.array([matrix.itemIndex.get(item, 0) for item in items], dtype=numpy.int64)
+        predictions = [-1] * len(items)
+        
+        (others, sims) = self.getNeighbourArrays(person, similarity, n)
+        if len(others) == 0 or len(itemIds) == 0:
+            return predictions
+        order = numpy.argsort(others)
+        (others, sims) = (others[order], sims[order])
+        
+        # gather the columns of all the items into one run of (slot, user, rating)
+        # entries, slot being the position of the item in items
+        starts = matrix.csc.indptr[itemIds]
+        lengths = matrix.csc.indptr[itemIds + 1] - starts
+        slots = numpy.repeat(numpy.arange(len(itemIds)), lengths)
+        entries = numpy.arange(lengths.sum()) + numpy.repeat(starts - (numpy.cumsum(lengths) - lengths), lengths)
+        users = matrix.csc.indices[entries]
+        if formula == 'resnick':
+            # ratings centred on the mean of the user who gave them
+            ratings = matrix.csc.data[entries] - stats.means[users]
+        else:
+            ratings = matrix.csc.data[entries].astype(numpy.float64)
+        
+        # keep the entries given by neighbours and weight them by their similarity,
+        # summed in neighbour order as getPrediction() does
+        pos = numpy.minimum(numpy.searchsorted(others, users), len(others) - 1)
+        kept = numpy.flatnonzero(others[pos] == users)
+        kept = kept[numpy.lexsort((order[pos[kept]], slots[kept]))]
+        weights = sims[pos[kept]]
+        slots = slots[kept]
+        total = numpy.bincount(slots, weights=weights * ratings[kept], minlength=len(items))
+        simSum = numpy.bincount(slots, weights=weights, minlength=len(items))
+        ratingCount = numpy.bincount(slots, minlength=len(items))
+        if self.instrument is not None:
+            self._countNeighbours(person, others, ratingCount.sum(), len(items))
+        
+        # items person has already rated can't be predicted either
+        seen = numpy.in1d(itemIds, matrix.getUserRow(uid)[0])
+        
+        for pos in numpy.flatnonzero(known & ~seen & (ratingCount > 0)):
+            if formula == 'resnick':
+                predictions[pos] = float(stats.means[uid] + total[pos] / simSum[pos])
+            else:
+                predictions[pos] = float(total[pos] / simSum[pos])
+        
+        return predictions
+    
+    
+    
+    '''getNeighbourArrays() method'''
+    def getNeighbourArrays(self, person, similarity, n):
+        ''' returns the neighbourhood of person as arrays of dense user ids and scores'''
+        matrix = self.getMatrix()
+        if self.approximate is not None and functions.similarity.matrix_similarity(similarity) is not None:
+            return self.getApproximateNeighbours(person, similarity, n)
+        index = self.getNeighbourIndex(similarity, n)
+        if index is not None:
+            return index.getNeighbours(matrix.userIndex[person], n)
+        
+        bestMatches = self.getNeighbourhood(person, similarity, n)
+        others = numpy.array([matrix.userIndex[other] for (sim, other) in bestMatches], dtype=numpy.int64)
+        sims = numpy.array([sim for (sim, other) in bestMatches], dtype=numpy.float64)
+        return (others, sims)
+    
+    
+    
+    '''getItemIndex() method'''
+    def getItemIndex(self, similarity=functions.similarity.adjusted_cosine_matrix, n=None):
+        ''' returns the truncated top-k item x item table of an item similarity, built'''
+        ''' on first use with k large enough for item neighbourhoods of size n'''
+        index = self.itemIndexes.get(similarity)
+        if index is None or (n is not None and n > index.k):
+            matrix = self.getMatrix()
+            numItems = matrix.getNumItems()
+            # items with equal scores are ranked by item key, whatever their dense ids
+            tieBreak = numpy.empty(numItems, dtype=numpy.int64)
+            tieBreak[sorted(range(numItems), key=matrix.items.__getitem__)] = numpy.arange(numItems)
+            k = max(n or 0, self.maxItemNeighbours)
+            path = self._storagePath('items_index_' + similarity.__name__)
+            index = neighbourindex.NeighbourIndex(self._scoreItemRows(similarity), numItems, k=k, tieBreak=tieBreak,
+                                                  blockSize=self._blockSize(numItems), path=path,
+                                                  fingerprint=None if path is None else self._indexFingerprint(k))
+            self.itemIndexes[similarity] = index
+        return index
+    
+    
+    
+    '''_scoreItemRows() method'''
+    def _scoreItemRows(self, similarity):
+        ''' returns a function that scores a block of items against every item'''
+        def scoreRows(rows):
+            scores = similarity(self.getMatrix(), rows, self.getStats())
+            if self.minCorated > 1 or self.significance is not None:
+                # counted over the users who rated both items
+                counts = functions.similarity.item_corated_counts(self.getMatrix(), rows, self.getStats())
+                scores = self._thresholdScores(scores, counts)
+            return scores
+        return scoreRows
+    
+    
+    
+    '''predictByItems() method'''
+    def predictByItems(self, person, items, similarity=functions.similarity.adjusted_cosine_matrix, n=50,
+                       formula='simple'):
+        ''' item-based predictions of person for every item in the list items, -1 when'''
+        ''' a prediction cannot be made; an item may be a title or a movie id'''
+        ''' an item is predicted from the ratings person gave to its (at most n) most'''
+        ''' similar items in the top-k item table, so only the items person rated are'''
+        ''' touched whatever the number of users'''
+        ''' formula='simple' is the similarity weighted average of those ratings,'''
+        ''' 'resnick' averages their offsets from the item means instead'''
+        if formula not in ('resnick', 'simple'):
+            raise ValueError("unknown formula: %r" % (formula,))
+        matrix = self.getMatrix()
+        itemMeans = self.getStats().getItemMeans()
+        items = [self.getItemId(item) for item in items]
+        predictions = [-1] * len(items)
+        
+        (rated, ratings) = matrix.getUserRow(matrix.userIndex[person])
+        if len(rated) == 0:
+            return predictions
+        if formula == 'resnick':
+            ratings = ratings - itemMeans[rated]
+        else:
+            ratings = ratings.astype(numpy.float64)
+        
+        index = self.getItemIndex(similarity, n)
+        for (pos, item) in enumerate(items):
+            iid = matrix.itemIndex.get(item)
+            # unknown items and items person has already rated can't be predicted
+            if iid is None or rated[min(numpy.searchsorted(rated, iid), len(rated) - 1)] == iid:
+                continue
+            
+            # the neighbours of the item that person rated
+            (others, sims) = index.getNeighbours(iid, n)
+            found = numpy.minimum(numpy.searchsorted(rated, others), len(rated) - 1)
+            match = rated[found] == others
+            if not match.any():
+                continue
+            weights = sims[match]
+            prediction = numpy.dot(weights, ratings[found[match]]) / weights.sum()
+            if formula == 'resnick':
+                prediction += itemMeans[iid]
+            predictions[pos] = float(prediction)
+        
+        return predictions
+    
+    
+    
+    '''getItemPrediction() method'''
+    def getItemPrediction(self, person, item, similarity=functions.similarity.adjusted_cosine_matrix, n=50,
+                          formula='simple'):
+        ''' item-based prediction for given person and item, -1 if it cannot be made'''
+        return self.predictByItems(person, [item], similarity, n, formula)[0]
+    
+    
+    
+    '''getItemRecommendations() method'''
+    def getItemRecommendations(self, person, similarity=functions.similarity.adjusted_cosine_matrix, n=50):
+        ''' item-based recommendations: every item person hasn't rated that has some of'''
+        ''' the items person rated among its n most similar items, scored with the'''
+        ''' weighted average of those ratings, as a [(prediction, title)] list, best first'''
+        ''' costs one pass over the top-k item table, whatever the number of users'''
+        matrix = self.getMatrix()
+        (rated, ratings) = matrix.getUserRow(matrix.userIndex[person])
+        if len(rated) == 0:
+            return []
+        (neighbours, scores) = self.getItemIndex(similarity, n).getTable(n)
+        
+        found = numpy.minimum(numpy.searchsorted(rated, neighbours), len(rated) - 1)
+        weights = numpy.where(rated[found] == neighbours, scores, 0)
+        simSums = weights.sum(axis=1)
+        totals = (weights * ratings[found]).sum(axis=1)
+        simSums[rated] = 0
+        
+        predictions = [(totals[iid] / simSums[iid], self.getTitle(matrix.items[iid]))
+                       for iid in numpy.flatnonzero(simSums > 0)]
+        predictions.sort()
+        predictions.reverse()
+        return predictions
+    
+    
+    
+    '''getFactorRecommendations() method'''
+    def getFactorRecommendations(self, person, n=None):
+        ''' latent factor recommendations: the (best n) items person hasn't rated as a'''
+        ''' [(prediction, title)] list, best first'''
+        matrix = self.getMatrix()
+        uid = matrix.userIndex[person]
+        scores = self.getModel().scoreItems(uid)
+        candidates = numpy.setdiff1d(numpy.arange(len(scores)), matrix.getUserRow(uid)[0])
+        scores = scores[candidates]
+        
+        return [(float(scores[pos]), self.getTitle(matrix.items[candidates[pos]]))
+                for pos in self._bestPositions(scores, n)]
+    
+    
+    
     '''testFromFile() method'''
-    def testFromFile(self, predictionsFile, filename):
+    def testFromFile(self, predictionsFile, filename, processes=None, chunkSize=10000, resume=False):
         ''' generates predictions for a group of (user, movie) pairs read in from a file'''
         ''' outputs the predictions to a file'''
+        ''' the file is streamed in chunks of chunkSize lines, each chunk is scored with'''
+        ''' predictBatch() and written out in one write, so memory use does not grow'''
+        ''' with the file; '-' means stdin / stdout and .gz files are (de)compressed'''
+        ''' processes > 1 scores the chunks in a pool of worker processes, forked once'''
+        ''' resume=True continues an interrupted run from its checkpoint file'''
         
-        outfile = open(predictionsFile, 'w')
+        # progress is checkpointed for plain output files only, stdout and gzip
+        # streams can't be cut back to the end of the last complete chunk
+        checkpointFile = None
+        if predictionsFile != '-' and not predictionsFile.endswith('.gz'):
+            checkpointFile = predictionsFile + '.checkpoint'
         
-        # read each line from file
-        for line in open(filename):
-            # extract user and movie and get prediction
-            (user, movie) = line.strip().split("\t")
-            #(user, movie) = line.split("\t")
-            pred = self.getPrediction(user, movie)
-            
-            # format a string for output and write to file
-            tempstr = user + "\t" + movie + "\t" + str(pred)
-            print(tempstr, file = outfile)
+        (linesDone, bytesDone) = (0, 0)
+        if resume and checkpointFile is not None:
+            (linesDone, bytesDone) = functions.fileio.read_checkpoint(checkpointFile)
+            # drop whatever was written after the last checkpoint
+            if os.path.exists(predictionsFile):
+                outfile = open(predictionsFile, 'r+')
+                outfile.truncate(bytesDone)
+                outfile.close()
+        
+        infile = functions.fileio.open_input(filename)
+        outfile = functions.fileio.open_output(predictionsFile, append=linesDone > 0)
+        
+        # one pool of workers scores every chunk
+        pool = None
+        if processes is not None and processes > 1:
+            pool = self._openPool(processes=processes)
         
-        outfile.close()
+        chunks = functions.fileio.read_chunks(infile, chunkSize, skip=linesDone)
+        try:
+            while True:
+                lines = instrumentation.timed(self.instrument, 'read', next, chunks, None)
+                if lines is None:
+                    break
+                # extract user and movie from each line
+                pairs = [tuple(line.strip().split("\t")) for line in lines if line.strip()]
+                
+                # get the predictions of the whole chunk at once, in file order
+                predictions = instrumentation.timed(self.instrument, 'predict', self.predictBatch, pairs,
+                                                    processes=processes, pool=pool)
+                
+                # format a string per prediction and write the chunk out
+                instrumentation.timed(self.instrument, 'write', self._writePredictions, outfile, pairs,
+                                      predictions)
+                
+                linesDone += len(lines)
+                if checkpointFile is not None:
+                    functions.fileio.write_checkpoint(checkpointFile, linesDone, outfile.tell())
+        finally:
+            if pool is not None:
+                self._closePool(pool)
+        
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+        
+        # a complete run leaves no checkpoint behind
+        if checkpointFile is not None and os.path.exists(checkpointFile):
+            os.remove(checkpointFile)
+    
+    
+    
+    '''_writePredictions() method'''
+    def _writePredictions(self, outfile, pairs, predictions):
+        ''' writes a "user movie prediction" line per pair to outfile in one write'''
+        outfile.write("".join([user + "\t" + movie + "\t" + str(pred) + "\n"
+                               for ((user, movie), pred) in zip(pairs, predictions)]))
+        outfile.flush()
     
     
     
@@ -254,9 +1485,9 @@ class Recommender(object):
     
     '''getRandomMovie() methos'''
     def getRandomMovie(self):
+        ''' returns a random movie id, as the ratings are keyed by it'''
         movieId = str(random.randint(1, len(self.movies)))
-        movieName = self.movies.get(movieId)
-        return movieName
+        return functions.loader.movie_key(movieId)
     
     
     
@@ -276,6 +1507,8 @@ class Recommender(object):
     
     '''getNumRatings() method'''
     def getNumRatings(self):
+        if self.matrix is not None:
+            return self.matrix.getNumRatings()
         count = 0
         # in this case, item is a dictionary: movies={movieid:moviename}
         for item in self.ratings.values():
@@ -0,0 +1,161 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the Sweep class.
+'''
+
+from __future__ import division, print_function
+import math
+import multiprocessing
+import numpy
+import functions.similarity
+import evaluate
+import recommender
+
+
+
+# the Sweep forked worker processes read from, see run()
+_shared = None
+
+
+
+'''_sweepFold() function'''
+def _sweepFold(task):
+    ''' runs in a worker process: sweeps the grid over one fold'''
+    return _shared.sweepFold(*task)
+
+
+
+''' A class that cross-validates a grid of recommender settings '''
+class Sweep(object):
+
+    '''constructor'''
+    def __init__(self, recommender, folds=5, seed=None):
+        ''' folds and seed set up the cross-validation folds, see Evaluate.makeFolds()'''
+        self.rec = recommender
+        self.evaluate = evaluate.Evaluate(recommender, seed)
+        self.numFolds = folds
+        self.seed = seed
+        self.table = []         # one row per setting: a dict of the setting and its statistics
+
+
+
+    '''run() method'''
+    def run(self, sizes=(10, 20, 50, 100, 200, 300), similarities=functions.similarity.SIMILARITIES,
+            minCorated=(1,), formulas=('resnick', 'simple'), processes=None):
+        ''' cross-validates every combination of neighbourhood size, similarity'''
+        ''' function, minimum co-rated count and prediction formula'''
+        ''' per fold each similarity matrix is computed once, and each neighbour index'''
+        ''' once per minimum co-rated count: every size is read off the same sorted lists'''
+        ''' processes > 1 sweeps the folds in a pool of forked worker processes'''
+        ''' returns the results table, the statistics pool the predictions of all folds'''
+        global _shared
+        self.evaluate.makeFolds(self.numFolds, self.seed)
+        tasks = [(fold, sizes, similarities, minCorated, formulas) for fold in range(self.numFolds)]
+        try:
+            if processes is not None and processes > 1:
+                _shared = self
+                pool = multiprocessing.Pool(min(processes, self.numFolds))
+                try:
+                    foldSums = pool.map(_sweepFold, tasks)
+                finally:
+                    pool.close()
+                    pool.join()
+            else:
+                foldSums = [self.sweepFold(*task) for task in tasks]
+        finally:
+            _shared = None
+            self.evaluate.folds = None
+
+        self.table = []
+        for similarity in similarities:
+            for minimum in minCorated:
+                for formula in formulas:
+                    for n in sizes:
+                        key = (similarity.__name__, minimum, formula, n)
+                        row = {'similarity': similarity.__name__, 'minCorated': minimum,
+                               'formula': formula, 'n': n}
+                        row.update(self.statistics([sums[key] for sums in foldSums]))
+                        self.table.append(row)
+        return self.table
+
+
+
+    '''sweepFold() method'''
+    def sweepFold(self, fold, sizes, similarities, minCorated, formulas):
+        ''' returns {(similarity name, minCorated, formula, n): error sums} for one fold'''
+        (test, training) = self.evaluate.getFold(fold)
+        pairs = [(user, movie) for (user, movie, rating) in test]
+        actual = numpy.array([rating for (user, movie, rating) in test])
+
+        foldRec = recommender.Recommender(loadFromFiles=False, backend=self.rec.backend, matrix=training)
+        foldRec.maxNeighbours = max(sizes)
+        foldRec.maxItemNeighbours = max(sizes)
+        foldRec.setSignificance(self.rec.significance)
+
+        sums = {}
+        for similarity in similarities:
+            # item x item similarities go straight into their top-k tables
+            if similarity not in functions.similarity.ITEM_SIMILARITIES:
+                foldRec.buildSimilarities(similarity)
+            for minimum in minCorated:
+                foldRec.setMinCorated(minimum)
+                for formula in formulas:
+                    for n in sizes:
+                        predictions = numpy.array(foldRec.predictBatch(pairs, similarity, n, formula))
+                        sums[(similarity.__name__, minimum, formula, n)] = self.errorSums(actual, predictions)
+            # one full similarity matrix at a time
+            foldRec.similarities.pop(similarity, None)
+            foldRec.neighbourIndexes = {}
+            foldRec.itemIndexes = {}
+        return sums
+
+
+
+    '''errorSums() method'''
+    def errorSums(self, actual, predictions):
+        ''' returns (tests, predicted, sum of squared errors, sum of absolute errors)'''
+        rated = predictions != -1
+        errors = actual[rated] - predictions[rated]
+        return (len(actual), int(rated.sum()), float(numpy.dot(errors, errors)),
+                float(numpy.abs(errors).sum()))
+
+
+
+    '''statistics() method'''
+    def statistics(self, foldSums):
+        ''' pools the error sums of several folds into MSE, RMSE, MAE and coverage'''
+        (tests, rated, sumsq, sumAbs) = [sum(column) for column in zip(*foldSums)]
+        mse = sumsq / rated if rated else float('nan')
+        return {'mse': mse,
+                'rmse': math.sqrt(mse),
+                'mae': sumAbs / rated if rated else float('nan'),
+                'coverage': rated / tests if tests else 0.0,
+                'tests': tests}
+
+
+
+    '''getTable() method'''
+    def getTable(self):
+        return self.table
+
+
+
+    '''formatTable() method'''
+    def formatTable(self, sortBy=None):
+        ''' returns the results table as text, one line per setting'''
+        ''' sortBy is a column to sort the lines on, e.g. 'rmse' '''
+        rows = self.table if sortBy is None else sorted(self.table, key=lambda row: row[sortBy])
+        lines = ["%-22s %10s %6s %8s %8s %8s %8s %8s" %
+                 ('similarity', 'minCorated', 'n', 'formula', 'MSE', 'RMSE', 'MAE', 'coverage')]
+        for row in rows:
+            lines.append("%-22s %10d %6d %8s %8.4f %8.4f %8.4f %8.4f" %
+                         (row['similarity'], row['minCorated'], row['n'], row['formula'],
+                          row['mse'], row['rmse'], row['mae'], row['coverage']))
+        return "\n".join(lines)
+
+
+
+    ''' ******* The End ****** '''
@@ -0,0 +1,152 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the UserStats class.
+'''
+
+from __future__ import division, print_function
+import numpy
+import functions.similarity
+import functions.storage
+
+
+
+''' A class that caches the rating statistics of every user of a RatingMatrix '''
+class UserStats(object):
+    
+    '''constructor'''
+    def __init__(self, matrix, directory=None):
+        ''' directory is where to map the sparse matrices of the vectorized similarities'''
+        ''' from temporary files, None keeps them in memory'''
+        self.matrix = matrix
+        self.directory = directory
+        self.means = numpy.zeros(0)     # average rating of every user
+        self.sumSq = numpy.zeros(0)     # sum of squared ratings of every user
+        self.counts = numpy.zeros(0, dtype=numpy.int64)    # number of ratings of every user
+        self.parts = None               # sparse matrices of the vectorized similarities
+        self.partsVersion = None        # RatingMatrix.version the parts were made for
+        self.levelParts = None          # per rating value indicator matrices, for spearman
+        self.itemMeans = None           # average rating of every item
+        self.itemParts = None           # item-centred sparse matrices, for item pearson
+        self.refresh()
+    
+    
+    
+    '''refresh() method'''
+    def refresh(self, uid=None, blockSize=4096):
+        ''' recomputes the statistics of user uid, or of every user, from the matrix'''
+        ''' must be called whenever ratings are added to or removed from the matrix'''
+        ''' the sparse matrices of the changed users are patched on their next use, the'''
+        ''' per item and per rating value ones are rebuilt'''
+        self.levelParts = None
+        self.itemMeans = None
+        self.itemParts = None
+        if uid is None:
+            self.parts = None
+        if uid is None or len(self.counts) != self.matrix.getNumUsers():
+            csr = self.matrix.csr
+            self.counts = numpy.diff(csr.indptr).astype(numpy.int64)
+            numUsers = len(self.counts)
+            sums = numpy.zeros(numUsers)
+            self.sumSq = numpy.zeros(numUsers)
+            # a block of users at a time, the matrix may be mapped from disk
+            for start in range(0, numUsers, blockSize):
+                end = min(start + blockSize, numUsers)
+                rows = numpy.repeat(numpy.arange(end - start), self.counts[start:end])
+                data = csr.data[csr.indptr[start]:csr.indptr[end]].astype(numpy.float64)
+                sums[start:end] = numpy.bincount(rows, weights=data, minlength=end - start)
+                self.sumSq[start:end] = numpy.bincount(rows, weights=data * data, minlength=end - start)
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                self.means = sums / self.counts
+            return
+        
+        values = self.matrix.getUserRow(uid)[1].astype(numpy.float64)
+        self.counts[uid] = len(values)
+        self.sumSq[uid] = numpy.dot(values, values)
+        self.means[uid] = values.sum() / len(values) if len(values) else numpy.nan
+    
+    
+    
+    '''getMean() method'''
+    def getMean(self, user):
+        return float(self.means[self.matrix.userIndex[user]])
+    
+    
+    
+    '''getSumSq() method'''
+    def getSumSq(self, user):
+        return float(self.sumSq[self.matrix.userIndex[user]])
+    
+    
+    
+    '''getCount() method'''
+    def getCount(self, user):
+        return int(self.counts[self.matrix.userIndex[user]])
+    
+    
+    
+    '''getItems() method'''
+    def getItems(self, user):
+        ''' returns the sorted item ids and the ratings of user, ready for co-rating'''
+        return self.matrix.getUserRow(self.matrix.userIndex[user])
+    
+    
+    
+    '''corated() method'''
+    def corated(self, person1, person2):
+        ''' returns the ratings of the items both persons rated as two parallel lists'''
+        index = self.matrix.userIndex
+        if self.counts[index[person1]] == 0 or self.counts[index[person2]] == 0:
+            return ([], [])
+        (values1, values2) = self.matrix.getCorated(index[person1], index[person2])
+        return (values1.tolist(), values2.tolist())
+    
+    
+    
+    '''getParts() method'''
+    def getParts(self):
+        ''' returns the sparse matrices the vectorized similarity functions work on'''
+        allocate = lambda n: functions.storage.scratch_array(self.directory, (n,))
+        if self.parts is not None and self.partsVersion != self.matrix.version:
+            # patched after one change of the matrix, rebuilt after more
+            if self.matrix.version == self.partsVersion + 1:
+                self.parts = functions.similarity.update_sparse_parts(self.parts, self.matrix, self.means, allocate)
+            else:
+                self.parts = None
+        if self.parts is None:
+            self.parts = functions.similarity.sparse_parts(self.matrix, self.means, allocate)
+        self.partsVersion = self.matrix.version
+        return self.parts
+    
+    
+    
+    '''getItemMeans() method'''
+    def getItemMeans(self):
+        ''' returns the average rating of every item, by dense item id'''
+        if self.itemMeans is None:
+            self.itemMeans = self.matrix.getItemMeans()
+        return self.itemMeans
+    
+    
+    
+    '''getItemParts() method'''
+    def getItemParts(self):
+        ''' returns the item-centred sparse matrices, see item_centred_parts()'''
+        if self.itemParts is None:
+            self.itemParts = functions.similarity.item_centred_parts(self.matrix, self.getItemMeans())
+        return self.itemParts
+    
+    
+    
+    '''getLevelParts() method'''
+    def getLevelParts(self):
+        ''' returns the rating values and their indicator matrices, see level_parts()'''
+        if self.levelParts is None:
+            self.levelParts = functions.similarity.level_parts(self.matrix)
+        return self.levelParts
+    
+    
+    
+    ''' ******* The End ****** '''
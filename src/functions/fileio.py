@@ -0,0 +1,81 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the file helpers used for streaming
+request and prediction files:
+1. open an input file, stdin ('-') or a gzip file (.gz)
+2. open an output file, stdout ('-') or a gzip file (.gz)
+3. read a file in chunks of lines
+4. read and write a resume checkpoint
+'''
+
+import gzip
+import itertools
+import os
+import sys
+
+
+
+'''1: open an input file'''
+def open_input(filename):
+    ''' returns a file object for reading filename, '-' means stdin'''
+    if filename == '-':
+        return sys.stdin
+    if filename.endswith('.gz'):
+        return gzip.open(filename, 'rb')
+    return open(filename)
+
+
+
+'''2: open an output file'''
+def open_output(filename, append=False):
+    ''' returns a file object for writing filename, '-' means stdout'''
+    if filename == '-':
+        return sys.stdout
+    mode = 'a' if append else 'w'
+    if filename.endswith('.gz'):
+        return gzip.open(filename, mode + 'b')
+    # a large buffer so that chunks go out in a few bulk writes
+    return open(filename, mode, 1 << 20)
+
+
+
+'''3: read a file in chunks of lines'''
+def read_chunks(infile, chunkSize, skip=0):
+    ''' yields lists of at most chunkSize lines, after skipping the first skip lines'''
+    lines = iter(infile)
+    for line in itertools.islice(lines, skip):
+        pass
+    while True:
+        chunk = list(itertools.islice(lines, chunkSize))
+        if not chunk:
+            return
+        yield chunk
+
+
+
+'''4: read a resume checkpoint'''
+def read_checkpoint(checkpointFile):
+    ''' returns (input lines done, output bytes written) recorded in checkpointFile'''
+    ''' or (0, 0) if there is no checkpoint'''
+    if not os.path.exists(checkpointFile):
+        return (0, 0)
+    (linesDone, bytesDone) = open(checkpointFile).read().split()
+    return (int(linesDone), int(bytesDone))
+
+
+
+'''4: write a resume checkpoint'''
+def write_checkpoint(checkpointFile, linesDone, bytesDone):
+    ''' records progress atomically: a crash leaves either the old or the new checkpoint'''
+    temp = checkpointFile + '.tmp'
+    outfile = open(temp, 'w')
+    outfile.write("%d %d\n" % (linesDone, bytesDone))
+    outfile.close()
+    os.rename(temp, checkpointFile)
+
+
+
+''' ******* The End ****** '''
@@ -0,0 +1,98 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the bulk loaders for the data files:
+1. load movies.dat into a {movieid: moviename} dict
+2. load ratings.dat into parallel numpy arrays
+3. turn a movie id into the key its ratings are stored under
+'''
+
+import numpy
+
+
+
+'''1: load movies.dat'''
+def load_movies(moviesFile):
+    ''' returns the {movieid: moviename} dict of a '|' separated movies file'''
+    movies = {}
+    for line in open(moviesFile):
+        movieList = line.split('|')
+        movies[movieList[0]] = movieList[1]
+    return movies
+
+
+
+'''2: load ratings.dat'''
+def load_ratings(ratingsFile, blockSize=1 << 24):
+    ''' returns (users, movies, ratings) arrays parsed from a tab separated'''
+    ''' "user movie rating timestamp" file, blockSize bytes at a time'''
+    ''' numbers are parsed in C by numpy; a file with non-numeric user or movie'''
+    ''' ids is parsed line by line instead'''
+    blocks = []
+    infile = open(ratingsFile)
+    rest = ''
+    while True:
+        data = infile.read(blockSize)
+        if not data:
+            break
+        # parse whole lines only, carry the cut one over to the next block
+        data = rest + data
+        cut = data.rfind('\n') + 1
+        (data, rest) = (data[:cut], data[cut:])
+        blocks.append(_parse_block(data))
+    if rest.strip():
+        blocks.append(_parse_block(rest))
+    infile.close()
+    
+    if any(block is None for block in blocks):
+        return _load_ratings_slow(ratingsFile)
+    
+    fields = numpy.concatenate(blocks) if blocks else numpy.zeros((0, 4))
+    return (fields[:, 0].astype(numpy.int64), fields[:, 1].astype(numpy.int64),
+            fields[:, 2])
+
+
+
+'''_parse_block() helper'''
+def _parse_block(data):
+    ''' returns the n x 4 array of the numbers in data, or None if a line is not numeric'''
+    numLines = data.count('\n') + (0 if data.endswith('\n') else 1)
+    fields = numpy.fromstring(data, sep=' ')
+    if len(fields) != 4 * numLines:
+        return None
+    fields = fields.reshape(numLines, 4)
+    # ids must be plain integers for str(int(id)) to give the original key back
+    if not numpy.array_equal(fields[:, :2], numpy.floor(fields[:, :2])):
+        return None
+    return fields
+
+
+
+'''_load_ratings_slow() helper'''
+def _load_ratings_slow(ratingsFile):
+    ''' line by line fallback of load_ratings(), ids are returned as strings'''
+    users = []
+    movies = []
+    ratings = []
+    for line in open(ratingsFile):
+        (user, movieid, rating, timestamp) = line.split('\t')
+        users.append(user)
+        movies.append(movieid)
+        ratings.append(float(rating))
+    return (numpy.array(users, dtype=object), numpy.array(movies, dtype=object),
+            numpy.array(ratings))
+
+
+
+'''3: movie keys'''
+def movie_key(movieid):
+    ''' returns the key the ratings of movieid are stored under: the integer id,'''
+    ''' or the id string itself when it is not a number'''
+    movieid = str(movieid).strip()
+    return int(movieid) if movieid.isdigit() else movieid
+
+
+
+''' ******* The End ****** '''
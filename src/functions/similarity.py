@@ -12,24 +12,66 @@ This file implements six similarity functions:
 4. spearman rank correlation similarity function
 5. spearman rank correlation using Michiel de Hoon's library
 6. spearman rank correlation using another formula
+
+and vectorized versions that score a block of users against every user
+of a RatingMatrix in one pass (4, 5 and 6 share one Spearman version),
+plus two item x item similarities for item-based prediction:
+7. adjusted cosine similarity
+8. pearson's correlation coefficient over items
 '''
 
 import math
+import numpy
+import scipy.sparse
 import scipy.stats.stats
-import Bio.Cluster
+
+
+
+'''corated_ratings() helper'''
+def corated_ratings(ratings, person1, person2, stats=None):
+    ''' returns the ratings person1 and person2 gave to their mutually rated items'''
+    ''' as two parallel lists, read from the UserStats cache stats when given'''
+    if stats is not None:
+        return stats.corated(person1, person2)
+    
+    # a RatingsView intersects the two users' sorted item id arrays
+    if hasattr(ratings, 'corated'):
+        return ratings.corated(person1, person2)
+    
+    rating1 = []
+    rating2 = []
+    for item in ratings[person1]:
+        if item in ratings[person2]:
+            rating1.append(ratings[person1][item])
+            rating2.append(ratings[person2][item])
+    
+    return (rating1, rating2)
+
+
+
+'''average_rating() helper'''
+def average_rating(ratings, person, stats=None):
+    ''' returns the average rating of person, read from the UserStats cache stats when given'''
+    if stats is not None:
+        return stats.getMean(person)
+    if hasattr(ratings, 'average'):
+        return ratings.average(person)
+    
+    return sum([ratings[person][item] for item in ratings[person]]) / len(ratings[person])
+
+
 
 '''1: mean squared difference similarity function'''
-def weighted_similarity1(ratings, person1, person2):
+def weighted_similarity1(ratings, person1, person2, stats=None):
     num_corated_item = 0
     sum_of_squares = 0
     
-    for item in ratings[person1]:
-        if item in ratings[person2]:
-            # count number of corated items
-            num_corated_item += 1
-            
-            # sum up sum of squares
-            sum_of_squares += pow(ratings[person1][item] - ratings[person2][item], 2)
+    for (r1, r2) in zip(*corated_ratings(ratings, person1, person2, stats)):
+        # count number of corated items
+        num_corated_item += 1
+        
+        # sum up sum of squares
+        sum_of_squares += pow(r1 - r2, 2)
     
     # if they are no ratings in common, return -1
     if num_corated_item == 0:
@@ -49,33 +91,30 @@ def weighted_similarity1(ratings, person1, person2):
 
 
 '''2: pearson's correlation coefficient similarity function'''
-def weighted_similarity(ratings, person1, person2):
+def weighted_similarity(ratings, person1, person2, stats=None):
     ''' Pearson's Correlation Coefficient'''
     ''' improved similarity assessment'''
     
-    # Get the list of mutually rated items
-    si=[]
-    for item in ratings[person1]:
-        if item in ratings[person2]:
-            si.append(item)
+    # Get the ratings of mutually rated items
+    (rating1, rating2) = corated_ratings(ratings, person1, person2, stats)
     
     # if they are no ratings in common, return -1
-    if len(si) == 0:
+    if len(rating1) == 0:
         return -1
     
     # calculate average ratings for person1 & person2
-    avg1 = sum([ratings[person1][item] for item in ratings[person1]]) / len(ratings[person1])
-    avg2 = sum([ratings[person2][item] for item in ratings[person2]]) / len(ratings[person2])
+    avg1 = average_rating(ratings, person1, stats)
+    avg2 = average_rating(ratings, person2, stats)
     
     # initialise accumulators
     num = 0
     sumSq1 = 0
     sumSq2 = 0
     
-    for item in si:
+    for (r1, r2) in zip(rating1, rating2):
         # Accumulate the numerator
-        d1 = ratings[person1][item] - avg1
-        d2 = ratings[person2][item] - avg2
+        d1 = r1 - avg1
+        d2 = r2 - avg2
         num += d1 * d2
         
         # accumulate the sum of sqrs
@@ -94,16 +133,13 @@ def weighted_similarity(ratings, person1, person2):
 
 
 '''3: cosine similarity function'''
-def weighted_similarity3(ratings, person1, person2):
+def weighted_similarity3(ratings, person1, person2, stats=None):
     
-    # Get the list of mutually rated items
-    si=[]
-    for item in ratings[person1]:
-        if item in ratings[person2]:
-            si.append(item)
+    # Get the ratings of mutually rated items
+    (rating1, rating2) = corated_ratings(ratings, person1, person2, stats)
     
     # if they are no ratings in common, return -1
-    if len(si) == 0:
+    if len(rating1) == 0:
         return -1
     
     # initialise accumulators
@@ -111,10 +147,9 @@ def weighted_similarity3(ratings, person1, person2):
     sumSq1 = 0
     sumSq2 = 0
     
-    for item in si:
+    for (r1, r2) in zip(rating1, rating2):
         # Accumulate the numerator
-        r1 = ratings[person1][item]     # rating(ui, itemk)
-        r2 = ratings[person2][item]     # rating(uj, itemk)
+        # r1 = rating(ui, itemk), r2 = rating(uj, itemk)
         num += r1 * r2
         
         # accumulate the sum of sqrs
@@ -133,21 +168,15 @@ def weighted_similarity3(ratings, person1, person2):
 
 
 '''4: spearman rank correlation similarity function'''
-def weighted_similarity4(ratings, person1, person2):
+def weighted_similarity4(ratings, person1, person2, stats=None):
     ''' Spearman's Rank Correlation Coefficient'''
     ''' improved similarity assessment'''
     
-    # n is the number of corated items
-    n = 0
-    rating1 = []
-    rating2 = []
-    
     # Get the ratings of corated items for person1 and person 2
-    for item in ratings[person1]:
-        if item in ratings[person2]:
-            rating1.append(ratings[person1][item])
-            rating2.append(ratings[person2][item])
-            n += 1
+    (rating1, rating2) = corated_ratings(ratings, person1, person2, stats)
+    
+    # n is the number of corated items
+    n = len(rating1)
     
     # if they are no ratings in common, return -1
     if len(rating1) == 0:
@@ -157,32 +186,18 @@ def weighted_similarity4(ratings, person1, person2):
     ranking1 = scipy.stats.stats.rankdata(rating1)
     ranking2 = scipy.stats.stats.rankdata(rating2)
     
-    # initialize the rakings dictionaries of corated items for person1 and person 2
-    R1 = {}
-    R2 = {}
-    for item in ratings[person1]:
-        if item in ratings[person2]:
-            R1[item] = 0.0
-            R2[item] = 0.0
-    
-    # get the rakings dictionaries of corated items for person1 and person 2
-    i = 0
-    for item in R1:
-        R1[item] = ranking1[i]
-        R2[item] = ranking2[i]
-        i += 1
-    
     # calculate the substrahend
-    sub = n * pow(((n + 1) / 2), 2)
+    # (n + 1) / 2 is the average rank, it must not be rounded down for even n
+    sub = n * pow(((n + 1) / 2.0), 2)
     
     # calculate every intermediate values for calculating rho
     product = 0
     square1 = 0
     square2 = 0
-    for item in R1:
-        product += R1[item] * R2[item]
-        square1 += pow(R1[item], 2)
-        square2 += pow(R2[item], 2)
+    for (R1, R2) in zip(ranking1, ranking2):
+        product += R1 * R2
+        square1 += pow(R1, 2)
+        square2 += pow(R2, 2)
     diff3 = product - sub
     diff1 = square1 - sub
     diff2 = square2 - sub
@@ -199,17 +214,12 @@ def weighted_similarity4(ratings, person1, person2):
 
 
 '''5: spearman rank correlation using Michiel de Hoon's library'''
-def weighted_similarity5(ratings, person1, person2):
+def weighted_similarity5(ratings, person1, person2, stats=None):
     ''' Spearman's Rank Correlation Coefficient'''
     ''' improved similarity assessment'''
     
     # Get the ratings of corated items for person1 and person 2
-    rating1 = []
-    rating2 = []
-    for item in ratings[person1]:
-        if item in ratings[person2]:
-            rating1.append(ratings[person1][item])
-            rating2.append(ratings[person2][item])
+    (rating1, rating2) = corated_ratings(ratings, person1, person2, stats)
     
     # if they are no ratings in common, return -1
     if len(rating1) == 0:
@@ -217,6 +227,8 @@ def weighted_similarity5(ratings, person1, person2):
     
     # calculate spearman's similarity using Michiel de Hoon's library
     # dist='s' means spearman
+    # (imported here: the library is slow to import and only needed by this function)
+    import Bio.Cluster
     similarity = 1 - Bio.Cluster.distancematrix((rating1, rating2), dist='s')[1][0]
     
     return similarity
@@ -224,21 +236,15 @@ def weighted_similarity5(ratings, person1, person2):
 
 
 '''6: spearman rank correlation using another formula'''
-def weighted_similarity6(ratings, person1, person2):
+def weighted_similarity6(ratings, person1, person2, stats=None):
     ''' Spearman's Rank Correlation Coefficient'''
     ''' improved similarity assessment'''
     
-    # n is the number of corated items
-    n = 0
-    rating1 = []
-    rating2 = []
-    
     # Get the ratings of corated items for person1 and person 2
-    for item in ratings[person1]:
-        if item in ratings[person2]:
-            rating1.append(ratings[person1][item])
-            rating2.append(ratings[person2][item])
-            n += 1
+    (rating1, rating2) = corated_ratings(ratings, person1, person2, stats)
+    
+    # n is the number of corated items
+    n = len(rating1)
     
     # if they are no ratings in common, return -1
     if len(rating1) == 0:
@@ -248,21 +254,6 @@ def weighted_similarity6(ratings, person1, person2):
     ranking1 = scipy.stats.stats.rankdata(rating1)
     ranking2 = scipy.stats.stats.rankdata(rating2)
     
-    # initialize the rakings dictionaries of corated items for person1 and person 2
-    R1 = {}
-    R2 = {}
-    for item in ratings[person1]:
-        if item in ratings[person2]:
-            R1[item] = 0.0
-            R2[item] = 0.0
-    
-    # get the rakings dictionaries of corated items for person1 and person 2
-    i = 0
-    for item in R1:
-        R1[item] = ranking1[i]
-        R2[item] = ranking2[i]
-        i += 1
-    
     # calculate average rankings for person1 & person2
     avg1 = sum([item for item in ranking1]) / n
     avg2 = sum([item for item in ranking2]) / n
@@ -273,9 +264,9 @@ def weighted_similarity6(ratings, person1, person2):
     sum1 = 0
     sum2 = 0
     product = 0
-    for item in R1:
-        diff1 = R1[item] - avg1
-        diff2 = R2[item] - avg2
+    for (R1, R2) in zip(ranking1, ranking2):
+        diff1 = R1 - avg1
+        diff2 = R2 - avg2
         
         product += diff1 * diff2
         sum1 += pow(diff1, 2)
@@ -292,4 +283,365 @@ def weighted_similarity6(ratings, person1, person2):
 
 
 
-''' ******* The End ****** '''
\ No newline at end of file
+
+'''corated_sums() helper'''
+def corated_sums(values, squares, indicator, rows, columns=None):
+    ''' values, squares (values^2) and indicator (1 for every rating) are pairs of'''
+    ''' users x items sparse matrices with the same structure and their transposes,'''
+    ''' returns four len(rows) x users arrays: sum of v1*v2, sum of v1^2, sum of v2^2'''
+    ''' and the number of co-rated items'''
+    ''' columns restricts the arrays to those users, see column_part()'''
+    rowIndicator = indicator[0][rows]
+    columnIndicator = column_part(indicator, columns)
+    
+    num = (values[0][rows] * column_part(values, columns)).toarray()
+    sumSq1 = (squares[0][rows] * columnIndicator).toarray()
+    sumSq2 = (rowIndicator * column_part(squares, columns)).toarray()
+    count = (rowIndicator * columnIndicator).toarray()
+    
+    return (num, sumSq1, sumSq2, count)
+
+
+
+'''column_part() helper'''
+def column_part(part, columns=None):
+    ''' returns the items x users side of a pair, only the users in columns if given:'''
+    ''' the cost of a product with it then grows with the ratings of those users'''
+    ''' rather than with the ratings of everyone'''
+    if columns is None:
+        return part[1]
+    return part[0][columns].T.tocsr()
+
+
+
+'''sparse_parts() helper'''
+def sparse_parts(matrix, means=None, allocate=numpy.empty, chunkSize=1 << 20):
+    ''' returns the sparse matrices the vectorized functions work on as a tuple'''
+    ''' (ratings, ratings^2, mean-centred ratings, centred^2, indicator), all float64'''
+    ''' every part is a pair (users x items, items x users) of csr matrices that share'''
+    ''' the index arrays of matrix.csr and matrix.csc, so products convert nothing'''
+    ''' allocate(n) returns the array that holds n values, e.g. a scratch memmap'''
+    if means is None:
+        means = matrix.getUserMeans()
+    (csr, csc) = (matrix.csr, matrix.csc)
+    
+    arrays = [(allocate(csr.nnz), allocate(csc.nnz)) for part in range(4)]
+    ones = allocate(csr.nnz)
+    ones[:] = 1
+    
+    # fill the arrays a slice of ratings at a time to keep the temporaries small
+    for (side, structure) in enumerate((csr, csc)):
+        for start in range(0, structure.nnz, chunkSize):
+            fill_parts(arrays, matrix, means, side, numpy.arange(start, min(start + chunkSize, structure.nnz)))
+    
+    return parts_pairs(matrix, arrays + [(ones, ones)])
+
+
+
+'''fill_parts() helper'''
+def fill_parts(arrays, matrix, means, side, positions):
+    ''' writes the ratings at positions of the csr (side 0) or csc (side 1) arrays of'''
+    ''' matrix, as ratings, squares, centred ratings and centred squares, to those'''
+    ''' positions of the four pairs of value arrays arrays'''
+    structure = (matrix.csr, matrix.csc)[side]
+    data = structure.data[positions].astype(numpy.float64)
+    if side == 0:
+        users = numpy.searchsorted(structure.indptr, positions, side='right') - 1
+    else:
+        users = structure.indices[positions]
+    arrays[0][side][positions] = data
+    arrays[1][side][positions] = data * data
+    # centre every rating on the average rating of its user
+    data -= means[users]
+    arrays[2][side][positions] = data
+    arrays[3][side][positions] = data * data
+
+
+
+'''parts_pairs() helper'''
+def parts_pairs(matrix, arrays):
+    ''' returns the parts of sparse_parts() made of the pairs of value arrays arrays'''
+    (csr, csc) = (matrix.csr, matrix.csc)
+    return tuple((scipy.sparse.csr_matrix((pair[0], csr.indices, csr.indptr), shape=csr.shape, copy=False),
+                  scipy.sparse.csr_matrix((pair[1], csc.indices, csc.indptr), shape=csr.shape[::-1], copy=False))
+                 for pair in arrays)
+
+
+
+'''update_sparse_parts() helper'''
+def update_sparse_parts(parts, matrix, means, allocate=numpy.empty):
+    ''' returns the parts of sparse_parts() of matrix before its last setUserRows(),'''
+    ''' brought up to date: the arrays are spliced like those of matrix and only the'''
+    ''' entries of the users whose ratings changed are recomputed'''
+    (version, plans, touched) = matrix.edit
+    arrays = [(part[0].data, part[1].data) for part in parts[:4]]
+    ones = parts[4][0].data
+    if plans is not None:
+        arrays = [(matrix.spliceArray(0, pair[0], allocate), matrix.spliceArray(1, pair[1], allocate))
+                  for pair in arrays]
+        ones = allocate(matrix.csr.nnz)
+        ones[:] = 1
+    for side in (0, 1):
+        fill_parts(arrays, matrix, means, side, touched[side])
+    return parts_pairs(matrix, arrays + [(ones, ones)])
+
+
+
+'''1: mean squared difference similarity for a block of users'''
+def msd_matrix(matrix, rows, stats=None, columns=None):
+    ''' returns the weighted_similarity1 score of every user in rows against every user'''
+    ''' (against the users in columns if given)'''
+    ''' stats is an optional UserStats cache to read the sparse matrices from'''
+    (values, squares, centred, centredSquares, indicator) = \
+        sparse_parts(matrix) if stats is None else stats.getParts()
+    (num, sumSq1, sumSq2, count) = corated_sums(values, squares, indicator, rows, columns)
+    
+    # sum of (r1 - r2)^2 over the co-rated items
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        difference = numpy.maximum(sumSq1 + sumSq2 - 2 * num, 0) / count
+    
+    similarity = 1 - difference / 16
+    
+    # if they are no ratings in common, the score is -1
+    similarity[count == 0] = -1
+    
+    return similarity
+
+
+
+'''2: pearson's correlation coefficient for a block of users'''
+def pearson_matrix(matrix, rows, stats=None, columns=None):
+    ''' returns the weighted_similarity score of every user in rows against every user'''
+    ''' (against the users in columns if given)'''
+    ''' stats is an optional UserStats cache to read the sparse matrices from'''
+    (values, squares, centred, centredSquares, indicator) = \
+        sparse_parts(matrix) if stats is None else stats.getParts()
+    
+    return correlation(*corated_sums(centred, centredSquares, indicator, rows, columns))
+
+
+
+'''3: cosine similarity for a block of users'''
+def cosine_matrix(matrix, rows, stats=None, columns=None):
+    ''' returns the weighted_similarity3 score of every user in rows against every user'''
+    ''' (against the users in columns if given)'''
+    ''' stats is an optional UserStats cache to read the sparse matrices from'''
+    (values, squares, centred, centredSquares, indicator) = \
+        sparse_parts(matrix) if stats is None else stats.getParts()
+    
+    return correlation(*corated_sums(values, squares, indicator, rows, columns))
+
+
+
+'''corated_counts() helper'''
+def corated_counts(matrix, rows, stats=None, columns=None):
+    ''' returns the len(rows) x users array of the number of items each user in rows'''
+    ''' rated in common with every user (with the users in columns if given)'''
+    indicator = (sparse_parts(matrix) if stats is None else stats.getParts())[4]
+    return (indicator[0][rows] * column_part(indicator, columns)).toarray()
+
+
+
+'''level_parts() helper'''
+def level_parts(matrix):
+    ''' returns the distinct rating values of matrix and, for each of them, the pair'''
+    ''' (users x items, items x users) of csr indicator matrices of the ratings with'''
+    ''' that value'''
+    (csr, csc) = (matrix.csr, matrix.csc)
+    levels = numpy.unique(csr.data)
+    
+    def indicator(structure, keep, shape):
+        kept = numpy.concatenate(([0], numpy.cumsum(keep)))
+        return scipy.sparse.csr_matrix((numpy.ones(kept[-1]), structure.indices[keep], kept[structure.indptr]),
+                                       shape=shape)
+    
+    parts = [(indicator(csr, csr.data == level, csr.shape), indicator(csc, csc.data == level, csr.shape[::-1]))
+             for level in levels]
+    return (levels, parts)
+
+
+
+'''4, 5, 6: spearman rank correlation for a block of users'''
+def spearman_matrix(matrix, rows, stats=None, columns=None):
+    ''' returns the spearman score of every user in rows against every user'''
+    ''' (against the users in columns if given)'''
+    ''' stats is an optional UserStats cache to read the sparse matrices from'''
+    ''' the ranks of a user depend on the items co-rated with each other user, but'''
+    ''' ratings take few distinct values: the rank of a value follows from how many'''
+    ''' co-rated items have each value, and those counts are products of per-value'''
+    ''' indicator matrices'''
+    (levels, parts) = level_parts(matrix) if stats is None else stats.getLevelParts()
+    if len(levels) > MAX_RANK_LEVELS:
+        return pairwise_spearman(matrix, rows, columns)
+    indicator = (sparse_parts(matrix) if stats is None else stats.getParts())[4]
+    rowParts = [part[0][rows] for part in parts]
+    rowIndicator = indicator[0][rows]
+    columnIndicator = column_part(indicator, columns)
+    columnParts = [column_part(part, columns) for part in parts]
+    
+    # number of co-rated items with each value, for person (1) and other (2)
+    count1 = [(rowPart * columnIndicator).toarray() for rowPart in rowParts]
+    count2 = [(rowIndicator * columnPart).toarray() for columnPart in columnParts]
+    count = sum(count1)
+    
+    # twice the (tied, averaged) rank of each value: 2 * below + count + 1
+    # doubled ranks are integers, so the sums below are exact
+    def ranks(counts):
+        (below, result) = (0, [])
+        for c in counts:
+            result.append(2 * below + c + 1)
+            below = below + c
+        return result
+    rank1 = ranks(count1)
+    rank2 = ranks(count2)
+    
+    # sum of R1*R2 over the co-rated items, one product per pair of values
+    product = numpy.zeros(count.shape)
+    for (rowPart, r1) in zip(rowParts, rank1):
+        for (columnPart, r2) in zip(columnParts, rank2):
+            product += (rowPart * columnPart).toarray() * r1 * r2
+    sumSq1 = sum(c * r * r for (c, r) in zip(count1, rank1))
+    sumSq2 = sum(c * r * r for (c, r) in zip(count2, rank2))
+    
+    # n * (average doubled rank)^2, the average doubled rank being n + 1
+    sub = count * (count + 1) ** 2
+    
+    return correlation(product - sub, sumSq1 - sub, sumSq2 - sub, count)
+
+
+
+'''pairwise_spearman() helper'''
+def pairwise_spearman(matrix, rows, columns=None):
+    ''' spearman_matrix() for ratings with too many distinct values, pair by pair'''
+    if columns is None:
+        columns = range(matrix.getNumUsers())
+    scores = numpy.empty((len(rows), len(columns)))
+    for (row, uid) in enumerate(rows):
+        for (column, other) in enumerate(columns):
+            (values1, values2) = matrix.getCorated(uid, other)
+            if len(values1) == 0:
+                scores[row, column] = -1
+                continue
+            ranks1 = scipy.stats.stats.rankdata(values1)
+            ranks2 = scipy.stats.stats.rankdata(values2)
+            scores[row, column] = correlation(*corated_moments(ranks1, ranks2))
+    return scores
+
+
+
+'''corated_moments() helper'''
+def corated_moments(ranks1, ranks2):
+    ''' returns the centred sums (num, sumSq1, sumSq2, count) of two rank vectors'''
+    d1 = ranks1 - ranks1.mean()
+    d2 = ranks2 - ranks2.mean()
+    return (numpy.array([numpy.dot(d1, d2)]), numpy.array([numpy.dot(d1, d1)]),
+            numpy.array([numpy.dot(d2, d2)]), numpy.array([len(ranks1)]))
+
+
+
+'''item_parts() helper'''
+def item_parts(matrix, stats=None):
+    ''' returns the parts of sparse_parts() with users and items swapped, every pair'''
+    ''' being (items x users, users x items), for the item x item functions'''
+    parts = sparse_parts(matrix) if stats is None else stats.getParts()
+    return tuple((part[1], part[0]) for part in parts)
+
+
+
+'''item_centred_parts() helper'''
+def item_centred_parts(matrix, itemMeans=None):
+    ''' returns the pairs (items x users, users x items) of the ratings centred on the'''
+    ''' average rating of their item and of those centred ratings squared'''
+    if itemMeans is None:
+        itemMeans = matrix.getItemMeans()
+    (csr, csc) = (matrix.csr, matrix.csc)
+    
+    # csc entries belong to the item of their column, csr entries to their index
+    cscItems = numpy.repeat(numpy.arange(csc.shape[1]), numpy.diff(csc.indptr))
+    centredCsc = csc.data - itemMeans[cscItems]
+    centredCsr = csr.data - itemMeans[csr.indices]
+    
+    def pair(dataCsc, dataCsr):
+        return (scipy.sparse.csr_matrix((dataCsc, csc.indices, csc.indptr), shape=csr.shape[::-1], copy=False),
+                scipy.sparse.csr_matrix((dataCsr, csr.indices, csr.indptr), shape=csr.shape, copy=False))
+    
+    return (pair(centredCsc, centredCsr), pair(centredCsc * centredCsc, centredCsr * centredCsr))
+
+
+
+'''7: adjusted cosine similarity for a block of items'''
+def adjusted_cosine_matrix(matrix, rows, stats=None):
+    ''' returns the adjusted cosine score of every item in rows against every item:'''
+    ''' the cosine of the ratings centred on the average rating of their user, over'''
+    ''' the users who rated both items'''
+    (values, squares, centred, centredSquares, indicator) = item_parts(matrix, stats)
+    
+    return correlation(*corated_sums(centred, centredSquares, indicator, rows))
+
+
+
+'''8: pearson's correlation coefficient for a block of items'''
+def item_pearson_matrix(matrix, rows, stats=None):
+    ''' returns the pearson score of every item in rows against every item: the'''
+    ''' ratings are centred on the average rating of their item'''
+    indicator = item_parts(matrix, stats)[4]
+    (centred, centredSquares) = item_centred_parts(matrix) if stats is None else stats.getItemParts()
+    
+    return correlation(*corated_sums(centred, centredSquares, indicator, rows))
+
+
+
+'''item_corated_counts() helper'''
+def item_corated_counts(matrix, rows, stats=None):
+    ''' returns the len(rows) x items array of the number of users who rated both'''
+    ''' each item in rows and every item'''
+    indicator = item_parts(matrix, stats)[4]
+    return (indicator[0][rows] * indicator[1]).toarray()
+
+
+
+'''correlation() helper'''
+def correlation(num, sumSq1, sumSq2, count):
+    ''' turns co-rated sums into scores: -1 without co-rated items, 0 if a norm is 0'''
+    den = numpy.sqrt(sumSq1 * sumSq2)
+    
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        similarity = numpy.where(den == 0, 0, num / den)
+    
+    similarity[count == 0] = -1
+    
+    return similarity
+
+
+
+# the six pairwise similarity functions, all accept an optional UserStats cache
+SIMILARITIES = (weighted_similarity1, weighted_similarity, weighted_similarity3,
+                weighted_similarity4, weighted_similarity5, weighted_similarity6)
+
+
+
+'''matrix_similarity() lookup'''
+def matrix_similarity(similarity):
+    ''' returns the vectorized version of a similarity function, or None if it has none'''
+    return MATRIX_SIMILARITIES.get(similarity)
+
+
+# pairwise similarity function -> vectorized block version
+MATRIX_SIMILARITIES = {
+    weighted_similarity1: msd_matrix,
+    weighted_similarity: pearson_matrix,
+    weighted_similarity3: cosine_matrix,
+    weighted_similarity4: spearman_matrix,
+    weighted_similarity5: spearman_matrix,
+    weighted_similarity6: spearman_matrix,
+}
+
+# the item x item similarities, scoring blocks of items like the functions above
+ITEM_SIMILARITIES = (adjusted_cosine_matrix, item_pearson_matrix)
+
+# most distinct rating values spearman_matrix() ranks with indicator matrices
+MAX_RANK_LEVELS = 16
+
+
+
+''' ******* The End ****** '''
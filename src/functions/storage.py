@@ -0,0 +1,105 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the helpers of the memory-mapped storage mode:
+1. allocate a scratch array backed by a temporary file
+2. open a stored .npy array copy-on-write
+3. create a stored .npy array and publish it when it is complete
+4. read the fingerprint stored next to an array
+
+Memory-mapped arrays live in the page cache rather than in the heap: the
+kernel pages them in on access and can drop them again under memory pressure.
+
+A stored array derived from the ratings is published with a fingerprint of
+what it was computed from, in a filename.fingerprint file next to it, and is
+only reused by a process that asks for the same fingerprint.
+'''
+
+import os
+import tempfile
+import numpy
+
+
+
+'''1: allocate a scratch array'''
+def scratch_array(directory, shape, dtype=numpy.float64):
+    ''' returns a zeroed array, mapped from an unlinked temporary file in directory'''
+    ''' or held in memory when directory is None'''
+    if directory is None or numpy.prod(shape) == 0:
+        return numpy.zeros(shape, dtype=dtype)
+    # the file is deleted as soon as it is closed, the mapping keeps it alive
+    return numpy.memmap(tempfile.TemporaryFile(dir=directory), dtype=dtype, mode='w+', shape=shape)
+
+
+
+'''2: open a stored array'''
+def open_array(filename, shape=None, dtype=None, fingerprint=None):
+    ''' maps the .npy file filename copy-on-write: changes stay private to the process'''
+    ''' returns None if there is no such file, it has another shape or dtype, or it was'''
+    ''' published with another fingerprint than the one given'''
+    if not os.path.exists(filename):
+        return None
+    if fingerprint is not None and read_fingerprint(filename) != fingerprint:
+        return None
+    array = numpy.load(filename, mmap_mode='c')
+    if shape is not None and array.shape != tuple(shape):
+        return None
+    if dtype is not None and array.dtype != numpy.dtype(dtype):
+        return None
+    return array
+
+
+
+'''3: create a stored array'''
+def create_array(filename, shape, dtype=numpy.float64, fill=0):
+    ''' returns a writable mapping of a new .npy file, filled with fill'''
+    ''' the file is written as filename.tmp until publish_array() renames it'''
+    array = numpy.lib.format.open_memmap(filename + '.tmp', mode='w+', dtype=dtype, shape=tuple(shape))
+    array[...] = fill
+    return array
+
+
+
+'''3: publish a stored array'''
+def publish_array(filename, array, fingerprint=None):
+    ''' flushes an array from create_array() and moves it into place atomically'''
+    ''' processes that mapped an older filename keep reading the old file'''
+    ''' fingerprint is stored next to it for open_array() to check'''
+    ''' returns the published file mapped copy-on-write'''
+    array.flush()
+    # the old fingerprint goes first, so that no process pairs it with the new array
+    remove_array(filename)
+    os.rename(filename + '.tmp', filename)
+    if fingerprint is not None:
+        outfile = open(filename + '.fingerprint.tmp', 'w')
+        outfile.write(fingerprint)
+        outfile.close()
+        os.rename(filename + '.fingerprint.tmp', filename + '.fingerprint')
+    return open_array(filename)
+
+
+
+'''3: remove a stored array'''
+def remove_array(filename):
+    ''' deletes the .npy file filename and its fingerprint, if there are any'''
+    for name in (filename + '.fingerprint', filename):
+        if os.path.exists(name):
+            os.remove(name)
+
+
+
+'''4: read a fingerprint'''
+def read_fingerprint(filename):
+    ''' returns the fingerprint the array filename was published with, or None'''
+    if not os.path.exists(filename + '.fingerprint'):
+        return None
+    infile = open(filename + '.fingerprint')
+    fingerprint = infile.read()
+    infile.close()
+    return fingerprint
+
+
+
+''' ******* The End ****** '''
@@ -0,0 +1,160 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file implements the helpers that make up synthetic datasets:
+1. draw power-law weights for the activity of users and popularity of movies
+2. draw random (user, movie, rating) triples, a block of users at a time
+3. write them to a ratings.dat file
+4. write a movies.dat file naming the movies
+5. write a testdata.dat file of (user, movie title) pairs
+
+The files are in the formats functions.loader reads, so a synthetic dataset
+loads exactly like the bundled one.
+
+The number of ratings of a user follows its activity weight and the movies it
+rates are drawn by popularity weight, both a Zipf law over randomly ranked
+users and movies. A rating is a movie quality plus a user bias plus noise,
+cut into 1..5 at the quantiles of ratingProbabilities, so that the ratings
+carry a signal neighbourhoods can pick up and have the distribution asked for.
+'''
+
+import numpy
+import scipy.special
+
+
+# share of the ratings 1 to 5 in MovieLens
+RATING_PROBABILITIES = (0.06, 0.11, 0.27, 0.34, 0.22)
+
+
+
+'''1: draw power-law weights'''
+def power_law_weights(size, exponent, random):
+    ''' returns size weights summing to 1, the k-th largest proportional to k ** -exponent'''
+    ''' and given to the positions in random order; exponent 0 gives equal weights'''
+    weights = numpy.arange(1, size + 1, dtype=numpy.float64) ** -exponent
+    weights = weights[random.permutation(size)]
+    return weights / weights.sum()
+
+
+
+'''2: draw random ratings'''
+def generate_blocks(numUsers, numItems, density=0.01, activity=0.8, popularity=1.0,
+                    ratingProbabilities=RATING_PROBABILITIES, userBias=0.5, noise=1.0, minRatings=1,
+                    maxFraction=0.5, blockSize=1 << 20, seed=None):
+    ''' yields (users, movies, ratings) arrays of about density * numUsers * numItems'''
+    ''' distinct ratings, for blocks of users of about blockSize ratings each, in user'''
+    ''' order; ids are counted from 1'''
+    ''' activity and popularity are the power-law exponents of the number of ratings of'''
+    ''' the users and the movies, a user rates at least minRatings and at most'''
+    ''' maxFraction of the movies'''
+    ''' ratingProbabilities are the shares of the ratings 1, 2, ...; userBias and noise'''
+    ''' are the standard deviations of the user bias and of the noise of a rating, that'''
+    ''' of the movie quality being 1'''
+    ''' the same arguments and seed always give the same ratings'''
+    if numUsers < 1 or numItems < 1:
+        raise ValueError("dataset needs users and items: %r" % ((numUsers, numItems),))
+    if not 0 < density <= 1:
+        raise ValueError("density out of range: %r" % (density,))
+    ratingProbabilities = numpy.asarray(ratingProbabilities, dtype=numpy.float64)
+    if len(ratingProbabilities) < 1 or (ratingProbabilities < 0).any() or ratingProbabilities.sum() <= 0:
+        raise ValueError("invalid rating probabilities: %r" % (ratingProbabilities.tolist(),))
+    random = numpy.random.RandomState(seed)
+    
+    # ratings per user, around their share of the total
+    cap = max(int(maxFraction * numItems), 1)
+    expected = density * numUsers * numItems * power_law_weights(numUsers, activity, random)
+    counts = numpy.clip(random.poisson(expected), min(minRatings, cap), cap)
+    
+    # movies are drawn by their cumulative popularity
+    cumulative = numpy.cumsum(power_law_weights(numItems, popularity, random))
+    quality = random.standard_normal(numItems)
+    bias = userBias * random.standard_normal(numUsers)
+    
+    # a rating is the bucket its score falls in, at the quantiles of the probabilities
+    shares = numpy.cumsum(ratingProbabilities / ratingProbabilities.sum())[:-1]
+    thresholds = scipy.special.ndtri(shares) * numpy.sqrt(1 + userBias ** 2 + noise ** 2)
+    
+    ends = numpy.cumsum(counts)
+    start = 0
+    while start < numUsers:
+        # the users of the block, at least one
+        end = max(int(numpy.searchsorted(ends, ends[start] - counts[start] + blockSize, 'right')), start + 1)
+        wanted = counts[start:end]
+        
+        # draw with replacement and drop the repeats until every user has its count;
+        # a user whose unrated movies are very unpopular may end up with a few less
+        cells = numpy.zeros(0, dtype=numpy.int64)
+        missing = wanted
+        for attempt in range(20):
+            users = numpy.repeat(numpy.arange(start, end, dtype=numpy.int64), missing)
+            movies = numpy.minimum(numpy.searchsorted(cumulative, random.random_sample(len(users)), 'right'),
+                                   numItems - 1)
+            cells = numpy.unique(numpy.concatenate([cells, users * numItems + movies]))
+            missing = wanted - numpy.bincount(cells // numItems - start, minlength=end - start)
+            if not missing.any():
+                break
+        
+        (users, movies) = (cells // numItems, cells % numItems)
+        scores = quality[movies] + bias[users] + noise * random.standard_normal(len(cells))
+        ratings = numpy.searchsorted(thresholds, scores).astype(numpy.float64) + 1
+        yield (users + 1, movies + 1, ratings)
+        start = end
+
+
+
+'''2: draw random ratings in one go'''
+def generate_ratings(numUsers, numItems, density=0.01, seed=None, **params):
+    ''' returns the (users, movies, ratings) arrays of all the blocks of generate_blocks()'''
+    blocks = list(generate_blocks(numUsers, numItems, density, seed=seed, **params))
+    return tuple(numpy.concatenate([block[field] for block in blocks]) for field in range(3))
+
+
+
+'''3: write ratings.dat'''
+def write_ratings(ratingsFile, users, movies, ratings, timestamp=898989898, append=False):
+    ''' writes tab separated "user movie rating timestamp" lines'''
+    ''' append=True adds them to the end of the file, to write it a block at a time'''
+    outfile = open(ratingsFile, 'a' if append else 'w')
+    for start in range(0, len(users), 1 << 16):
+        block = slice(start, start + (1 << 16))
+        outfile.write("".join(["%d\t%d\t%.1f\t%d\n" % (user, movie, rating, timestamp)
+                               for (user, movie, rating) in zip(users[block].tolist(), movies[block].tolist(),
+                                                                ratings[block].tolist())]))
+    outfile.close()
+
+
+
+'''4: write movies.dat'''
+def write_movies(moviesFile, numItems):
+    ''' writes a '|' separated line for each of the movies 1..numItems'''
+    outfile = open(moviesFile, 'w')
+    outfile.write("".join(["%d|%s|01-Jan-2000||http://localhost/%d|%s\n" % (movie, movie_title(movie), movie,
+                                                                           '|'.join(['0'] * 19))
+                           for movie in range(1, numItems + 1)]))
+    outfile.close()
+
+
+
+'''4: name a movie'''
+def movie_title(movie):
+    ''' returns the title write_movies() gives movie'''
+    return "Movie %d (2000)" % (movie,)
+
+
+
+'''5: write testdata.dat'''
+def write_tests(testFile, numUsers, numItems, numTests, seed=None):
+    ''' writes numTests random tab separated "user title" lines'''
+    random = numpy.random.RandomState(seed)
+    users = random.randint(1, numUsers + 1, size=numTests)
+    movies = random.randint(1, numItems + 1, size=numTests)
+    outfile = open(testFile, 'w')
+    outfile.write("".join(["%d\t%s\n" % (user, movie_title(movie))
+                           for (user, movie) in zip(users.tolist(), movies.tolist())]))
+    outfile.close()
+
+
+
+''' ******* The End ****** '''
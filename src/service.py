@@ -0,0 +1,312 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This script serves the recommender over HTTP on the local machine:
+1. the ratings are loaded once, when the service starts
+2. GET /predict?user=<user>&item=<item>[&item=<item> ...] returns predictions
+3. GET /top?user=<user>[&n=20] returns the top-n recommendations
+4. GET /stats returns the request counts, the p50/p99 latencies and batch sizes
+
+Every request is served in its own thread. Predictions are not made by the
+request threads: they queue (user, item) pairs and one batching thread scores
+whatever has queued up with a single Recommender.predictBatch() call, so that
+concurrent requests share the neighbourhood lookups and matrix products.
+
+usage: python service.py [--port 8080] [--backend sparse] [--max-batch 256] [--max-wait 5]
+'''
+
+from __future__ import division, print_function
+import argparse
+import BaseHTTPServer
+import collections
+import json
+import Queue
+import SocketServer
+import threading
+import time
+import urlparse
+import numpy
+import classes.recommender
+import functions.similarity
+
+
+
+''' A class that coalesces concurrent prediction requests into batches '''
+class MicroBatcher(object):
+    
+    '''constructor'''
+    def __init__(self, recommender, lock, similarity, n=300, formula='resnick', maxBatch=256, maxWait=0.005):
+        ''' the batching thread scores up to maxBatch pairs at a time, waiting at most'''
+        ''' maxWait seconds after the first pair for more to arrive'''
+        ''' lock serialises the use of recommender with the other request threads'''
+        self.rec = recommender
+        self.lock = lock
+        self.similarity = similarity
+        self.n = n
+        self.formula = formula
+        self.maxBatch = maxBatch
+        self.maxWait = maxWait
+        self.queue = Queue.Queue()
+        self.batchSizes = collections.deque(maxlen=10000)   # pairs scored per batch, most recent
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+    
+    
+    
+    '''predict() method'''
+    def predict(self, pairs):
+        ''' returns the predictions of a list of (user, item) pairs, blocking until'''
+        ''' the batching thread has scored them'''
+        request = {'pairs': pairs, 'done': threading.Event(), 'predictions': None, 'error': None}
+        self.queue.put(request)
+        request['done'].wait()
+        if request['error'] is not None:
+            raise request['error']
+        return request['predictions']
+    
+    
+    
+    '''run() method'''
+    def run(self):
+        ''' the batching thread: takes the queued requests and scores them together'''
+        while True:
+            requests = [self.queue.get()]
+            size = len(requests[0]['pairs'])
+            deadline = time.time() + self.maxWait
+            while size < self.maxBatch:
+                try:
+                    request = self.queue.get(timeout=max(deadline - time.time(), 0))
+                except Queue.Empty:
+                    break
+                requests.append(request)
+                size += len(request['pairs'])
+            self.score(requests)
+    
+    
+    
+    '''score() method'''
+    def score(self, requests):
+        ''' scores the pairs of requests with one predictBatch() call and hands each'''
+        ''' request its share of the predictions'''
+        pairs = [pair for request in requests for pair in request['pairs']]
+        try:
+            with self.lock:
+                predictions = self.rec.predictBatch(pairs, self.similarity, self.n, self.formula)
+        except Exception as error:
+            for request in requests:
+                request['error'] = error
+                request['done'].set()
+            return
+        self.batchSizes.append(len(pairs))
+        
+        start = 0
+        for request in requests:
+            end = start + len(request['pairs'])
+            request['predictions'] = predictions[start:end]
+            start = end
+            request['done'].set()
+
+
+
+''' A class that records the latency of the requests of every endpoint '''
+class LatencyStats(object):
+    
+    '''constructor'''
+    def __init__(self, window=10000):
+        ''' percentiles are taken over the last window requests of an endpoint'''
+        self.lock = threading.Lock()
+        self.window = window
+        self.latencies = {}     # endpoint -> recent latencies in seconds
+        self.counts = {}        # endpoint -> number of requests served
+    
+    
+    
+    '''record() method'''
+    def record(self, endpoint, seconds):
+        with self.lock:
+            self.latencies.setdefault(endpoint, collections.deque(maxlen=self.window)).append(seconds)
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+    
+    
+    
+    '''summary() method'''
+    def summary(self):
+        ''' returns {endpoint: {requests, p50, p99, max}}, latencies in milliseconds'''
+        with self.lock:
+            latencies = dict((endpoint, numpy.array(values) * 1000) for (endpoint, values) in self.latencies.items())
+            counts = dict(self.counts)
+        return dict((endpoint, {'requests': counts[endpoint],
+                                'p50': float(numpy.percentile(values, 50)),
+                                'p99': float(numpy.percentile(values, 99)),
+                                'max': float(values.max())})
+                    for (endpoint, values) in latencies.items())
+
+
+
+''' A class that serves every request in its own thread '''
+class ThreadingHTTPServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+
+''' A class that answers the HTTP requests of the service '''
+class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    
+    # set up by serve(): the recommender, its lock, the MicroBatcher and the LatencyStats
+    service = None
+    
+    '''do_GET() method'''
+    def do_GET(self):
+        started = time.time()
+        url = urlparse.urlparse(self.path)
+        query = urlparse.parse_qs(url.query)
+        endpoint = url.path.rstrip('/') or '/'
+        handlers = {'/predict': self.predict, '/top': self.top, '/stats': self.stats}
+        if endpoint not in handlers:
+            self.reply(404, {'error': "unknown endpoint: %r" % (url.path,)})
+            return
+        try:
+            (status, body) = handlers[endpoint](query)
+        except (KeyError, ValueError) as error:
+            (status, body) = (400, {'error': str(error)})
+        self.reply(status, body)
+        self.service['latency'].record(endpoint, time.time() - started)
+    
+    
+    
+    '''predict() method'''
+    def predict(self, query):
+        ''' /predict?user=<user>&item=<item>...: the predictions of user, -1 when none'''
+        user = self.argument(query, 'user')
+        items = query.get('item', [])
+        if not items:
+            raise ValueError("missing argument: 'item'")
+        if user not in self.service['rec'].getMatrix().userIndex:
+            return (404, {'error': "unknown user: %r" % (user,)})
+        predictions = self.service['batcher'].predict([(user, item) for item in items])
+        return (200, {'user': user,
+                      'predictions': [{'item': item, 'prediction': prediction}
+                                      for (item, prediction) in zip(items, predictions)]})
+    
+    
+    
+    '''top() method'''
+    def top(self, query):
+        ''' /top?user=<user>&n=<n>: the n best recommendations of user'''
+        user = self.argument(query, 'user')
+        n = int(query.get('n', ['20'])[0])
+        rec = self.service['rec']
+        if user not in rec.getMatrix().userIndex:
+            return (404, {'error': "unknown user: %r" % (user,)})
+        with self.service['lock']:
+            recommendations = rec.getTopN(user, n, self.service['batcher'].similarity)
+        return (200, {'user': user,
+                      'recommendations': [{'item': title, 'prediction': prediction}
+                                          for (prediction, title) in recommendations]})
+    
+    
+    
+    '''stats() method'''
+    def stats(self, query):
+        ''' /stats: requests served, latencies, batch sizes and cache counters'''
+        batchSizes = list(self.service['batcher'].batchSizes)
+        with self.service['lock']:
+            cache = self.service['rec'].getCacheCounters()
+        return (200, {'latency': self.service['latency'].summary(),
+                      'batches': {'count': len(batchSizes),
+                                  'meanSize': float(numpy.mean(batchSizes)) if batchSizes else 0.0,
+                                  'maxSize': max(batchSizes) if batchSizes else 0},
+                      'cache': cache})
+    
+    
+    
+    '''argument() method'''
+    def argument(self, query, name):
+        ''' returns the single value of a required query argument'''
+        if name not in query:
+            raise ValueError("missing argument: %r" % (name,))
+        return query[name][0]
+    
+    
+    
+    '''reply() method'''
+    def reply(self, status, body):
+        # the titles of the data files are latin-1 bytes
+        data = json.dumps(body, encoding='latin-1')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    
+    
+    '''log_message() method'''
+    def log_message(self, format, *args):
+        # one line per request would dominate the cost of a load test
+        pass
+
+
+
+'''serve() function'''
+def serve(recommender, port=8080, host='127.0.0.1', similarity=functions.similarity.weighted_similarity,
+          n=300, formula='resnick', maxBatch=256, maxWait=0.005):
+    ''' serves recommender on host:port until interrupted'''
+    lock = threading.Lock()
+    RequestHandler.service = {'rec': recommender, 'lock': lock,
+                              'batcher': MicroBatcher(recommender, lock, similarity, n, formula, maxBatch, maxWait),
+                              'latency': LatencyStats()}
+    server = ThreadingHTTPServer((host, port), RequestHandler)
+    print("serving on http://%s:%d" % (host, port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+
+'''main() function'''
+def main():
+    parser = argparse.ArgumentParser(description="local HTTP prediction service")
+    parser.add_argument('--ratings', default="../data/ratings.dat")
+    parser.add_argument('--movies', default="../data/movies.dat")
+    parser.add_argument('--snapshot', default=None, help="snapshot directory to load instead of the files")
+    parser.add_argument('--backend', default='sparse', choices=('dict', 'sparse'))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--similarity', default='weighted_similarity', help="a function of functions.similarity")
+    parser.add_argument('--n', type=int, default=300, help="neighbourhood size")
+    parser.add_argument('--formula', default='resnick', choices=('resnick', 'simple'))
+    parser.add_argument('--max-batch', type=int, default=256, help="most pairs scored per batch")
+    parser.add_argument('--max-wait', type=float, default=5, help="milliseconds a batch waits to fill up")
+    parser.add_argument('--cache', type=int, default=None, help="entries of the prediction cache")
+    args = parser.parse_args()
+    
+    if args.snapshot is not None:
+        recommender = classes.recommender.Recommender(loadFromFiles=False, backend=args.backend,
+                                                      snapshot=args.snapshot)
+    else:
+        recommender = classes.recommender.Recommender(args.ratings, args.movies, backend=args.backend)
+    if args.cache is not None:
+        recommender.setCache(args.cache)
+    similarity = getattr(functions.similarity, args.similarity)
+    
+    # build the neighbour index before the first request rather than during it
+    recommender.getStats().getParts()
+    recommender.getNeighbourArrays(recommender.getMatrix().users[0], similarity, args.n)
+    
+    serve(recommender, args.port, args.host, similarity, args.n, args.formula, args.max_batch,
+          args.max_wait / 1000)
+
+
+
+if __name__ == '__main__':
+    main()
+
+
+
+''' ******* The End ****** '''
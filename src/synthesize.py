@@ -0,0 +1,89 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This script writes a synthetic dataset for scaling tests, without fetching
+any real data:
+1. ratings.dat and movies.dat, in the formats Recommender.loadData() reads
+2. testdata.dat, random (user, movie title) pairs for testFromFile()
+3. with --snapshot, a snapshot directory Recommender(snapshot=...) opens
+   without parsing the text files
+
+The ratings are drawn a block of users at a time, so the text files of a
+dataset far larger than memory can be written; the snapshot needs all the
+ratings in memory at once.
+
+usage: python synthesize.py --users 1000000 --items 20000 --density 0.001 --output ../data/synthetic [--snapshot]
+'''
+
+from __future__ import division, print_function
+import argparse
+import os
+import sys
+import numpy
+import classes.recommender
+import functions.loader
+import functions.synthetic
+
+
+
+'''main() function'''
+def main():
+    parser = argparse.ArgumentParser(description="writes a synthetic ratings dataset")
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--density', type=float, default=0.01, help="share of the (user, movie) pairs rated")
+    parser.add_argument('--activity', type=float, default=0.8, help="power-law exponent of the users' ratings")
+    parser.add_argument('--popularity', type=float, default=1.0, help="power-law exponent of the movies' ratings")
+    parser.add_argument('--rating-probabilities', default=','.join(str(p) for p in
+                                                                    functions.synthetic.RATING_PROBABILITIES),
+                        help="shares of the ratings 1, 2, ..., comma separated")
+    parser.add_argument('--user-bias', type=float, default=0.5, help="standard deviation of the user biases")
+    parser.add_argument('--noise', type=float, default=1.0, help="standard deviation of the rating noise")
+    parser.add_argument('--min-ratings', type=int, default=1, help="fewest ratings of a user")
+    parser.add_argument('--max-fraction', type=float, default=0.5, help="largest share of the movies a user rates")
+    parser.add_argument('--tests', type=int, default=10000, help="lines of testdata.dat")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default="../data/synthetic", help="directory to write the files to")
+    parser.add_argument('--snapshot', action='store_true', help="also write a snapshot to <output>/snapshot")
+    args = parser.parse_args()
+    
+    if not os.path.isdir(args.output):
+        os.makedirs(args.output)
+    ratingsFile = os.path.join(args.output, 'ratings.dat')
+    moviesFile = os.path.join(args.output, 'movies.dat')
+    probabilities = [float(p) for p in args.rating_probabilities.split(',')]
+    
+    blocks = functions.synthetic.generate_blocks(args.users, args.items, args.density, args.activity,
+                                                 args.popularity, probabilities, args.user_bias, args.noise,
+                                                 args.min_ratings, args.max_fraction, seed=args.seed)
+    kept = []
+    numRatings = 0
+    for (number, (users, movies, ratings)) in enumerate(blocks):
+        functions.synthetic.write_ratings(ratingsFile, users, movies, ratings, append=number > 0)
+        numRatings += len(users)
+        if args.snapshot:
+            kept.append((users, movies, ratings))
+        print("%d ratings written" % (numRatings,), file=sys.stderr)
+    functions.synthetic.write_movies(moviesFile, args.items)
+    functions.synthetic.write_tests(os.path.join(args.output, 'testdata.dat'), args.users, args.items,
+                                    args.tests, args.seed)
+    
+    if args.snapshot:
+        # stored as loadData() would store the text files
+        recommender = classes.recommender.Recommender(loadFromFiles=False, backend='sparse')
+        recommender.setMovies(functions.loader.load_movies(moviesFile))
+        recommender.loadArrays(*[numpy.concatenate([block[field] for block in kept]) for field in range(3)])
+        recommender.saveSnapshot(os.path.join(args.output, 'snapshot'))
+    
+    print("%d users, %d movies, %d ratings in %s" % (args.users, args.items, numRatings, args.output))
+
+
+
+if __name__ == '__main__':
+    main()
+
+
+
+''' ******* The End ****** '''
@@ -31,6 +31,7 @@ myRecommender = classes.recommender.Recommender(ratingsFile, moviesFile)
 myEvaluate = classes.evaluate.Evaluate(myRecommender)
 myEvaluate.evaluate(percentage=.01)
 #myEvaluate.evaluate(percentage=.01, iterations=10)
+#(foldStats, total) = myEvaluate.crossValidate(folds=5, seed=1, processes=4)
 
 mse = myEvaluate.getMSE()
 coverage = myEvaluate.getCoverage()
@@ -48,19 +49,71 @@ print
 #num = len(rate)
 #print num
 
+# test saving a binary snapshot and opening it again without parsing the text files
+#myRecommender.saveSnapshot('../data/snapshot')
+#myRecommender = classes.recommender.Recommender(snapshot='../data/snapshot', mmap=True)
+
 # test testFromFile
 #myRecommender.testFromFile(testFile)
 
+# test a sweep of neighbourhood sizes, similarity functions and formulas
+#import classes.sweep
+#mySweep = classes.sweep.Sweep(myRecommender, folds=5, seed=1)
+#mySweep.run(sizes=(20, 50, 100, 200, 300), minCorated=(1, 5, 10), processes=4)
+#print (mySweep.formatTable(sortBy='rmse'))
+
 # test getRecommendations()
 #rec = myRecommender.getRecommendations('514')
 #print "recommendation: ", rec
 
+# test adding and removing ratings online, predictions see them right away
+#myRecommender.addRating('514', 'Donnie Brasco (1997)', 4)
+#myRecommender.addRatings([('514', 'Star Wars (1977)', 5), ('944', 'Star Wars (1977)', 4)])
+#myRecommender.removeRating('514', 'Donnie Brasco (1997)')
+
+# test the neighbourhood and prediction cache
+#myRecommender.setCache(10000)
+#myRecommender.testFromFile(predictionsFile, testFile)
+#print "cache: ", myRecommender.getCacheCounters()
+
+# test the stage timers and counters, and a cProfile dump of the instrumented stages
+#instrument = myRecommender.setInstrument(profile='../data/recommender.prof')
+#myRecommender.testFromFile(predictionsFile, testFile)
+#print (instrument.formatReport())
+#print (instrument.formatProfile(limit=20))
+
+# test significance weighting: similarities over fewer than 50 co-rated items are shrunk
+#myRecommender.setMinCorated(5)
+#myRecommender.setSignificance(50)
+
+# test getTopN()
+#top = myRecommender.getTopN('514', 20, minSupport=5)
+#print "top 20: ", top
+
 # test getPrediction()
 #userId = myRecommender.getRandomUser()
-#movieName = myRecommender.getRandomMovie()
+#movieId = myRecommender.getRandomMovie()
 #pred = myRecommender.getPrediction('514', 'Donnie Brasco (1997)')
 #print "prediction: ", pred
 
+# test item-based predictions and recommendations from the top-k item x item table
+#import functions.similarity
+#pred = myRecommender.getItemPrediction('514', 'Donnie Brasco (1997)', functions.similarity.adjusted_cosine_matrix)
+#print "item-based prediction: ", pred
+#rec = myRecommender.getItemRecommendations('514')
+#print "item-based recommendation: ", rec[:10]
+
+# test approximate neighbourhoods: fewer tables or more bits trade accuracy for speed
+#myRecommender.setApproximate(tables=20, bits=6, probes=1, seed=1)
+#print (classes.evaluate.Evaluate(myRecommender).crossValidate(folds=5, seed=1)[1])
+#myRecommender.setApproximate()
+
+# test the latent factor engine against the neighbourhood engine on the same folds
+#myRecommender.setEngine('factors', factors=20, regularization=0.1, seed=1)
+#print (classes.evaluate.Evaluate(myRecommender).crossValidate(folds=5, seed=1)[1])
+#myRecommender.setEngine('neighbours')
+#print (classes.evaluate.Evaluate(myRecommender).crossValidate(folds=5, seed=1)[1])
+
 # test getNumUsers()
 #print "number of users: ", myRecommender.getNumUsers()
 
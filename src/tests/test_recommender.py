@@ -0,0 +1,71 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file tests the Recommender class on the bundled data files.
+
+usage (from src): python -m unittest discover -s tests -t .
+'''
+
+from __future__ import division, print_function
+import unittest
+import classes.recommender
+import classes.ratingmatrix
+import functions.similarity
+
+
+
+''' Tests of Recommender on the bundled ratings '''
+class RecommenderTest(unittest.TestCase):
+    
+    '''setUpClass() method'''
+    @classmethod
+    def setUpClass(cls):
+        cls.rec = classes.recommender.Recommender('../data/ratings.dat', '../data/movies.dat', backend='sparse')
+    
+    
+    
+    '''test_itemSimilarities() method'''
+    def test_itemSimilarities(self):
+        ''' getPrediction(), getPrediction1() and getRecommendations() take an item x item'''
+        ''' similarity as predictBatch() does'''
+        for similarity in functions.similarity.ITEM_SIMILARITIES:
+            self.assertEqual(self.rec.getPrediction('514', 'Donnie Brasco (1997)', similarity),
+                             self.rec.predictBatch([('514', 'Donnie Brasco (1997)')], similarity)[0])
+            self.assertEqual(self.rec.getPrediction1('514', 'Donnie Brasco (1997)', similarity),
+                             self.rec.predictByItems('514', ['Donnie Brasco (1997)'], similarity, 300)[0])
+            self.assertEqual(self.rec.getRecommendations('514', similarity),
+                             self.rec.getItemRecommendations('514', similarity))
+    
+    
+    
+    '''test_matrixEdits() method'''
+    def test_matrixEdits(self):
+        ''' a recommender over a RatingMatrix edits the matrix in place, whatever its backend'''
+        ratings = {'1': {1: 4.0, 2: 3.0}, '2': {1: 5.0, 3: 2.0}, '3': {2: 4.0, 3: 1.0}}
+        for backend in ('dict', 'sparse'):
+            rec = classes.recommender.Recommender(loadFromFiles=False, backend=backend,
+                                                  matrix=classes.ratingmatrix.RatingMatrix.fromDict(ratings))
+            rec.addRating('1', 3, 5.0)
+            rec.addRating('4', 1, 2.0)
+            rec.removeRating('2', 1)
+            self.assertEqual(dict(rec.ratings['1'].items()), {1: 4.0, 2: 3.0, 3: 5.0})
+            self.assertEqual(dict(rec.ratings['2'].items()), {3: 2.0})
+            self.assertEqual(dict(rec.ratings['4'].items()), {1: 2.0})
+            self.assertEqual(rec.matrix.toDict(), {'1': {1: 4.0, 2: 3.0, 3: 5.0}, '2': {3: 2.0},
+                                                   '3': {2: 4.0, 3: 1.0}, '4': {1: 2.0}})
+    
+    
+    
+    '''test_stringItemId() method'''
+    def test_stringItemId(self):
+        ''' a movie id given as a string names the same movie as the number and the title'''
+        prediction = self.rec.getPrediction('514', 242)
+        self.assertNotEqual(prediction, -1)
+        self.assertEqual(self.rec.getPrediction('514', '242'), prediction)
+        self.assertEqual(self.rec.getPrediction('514', self.rec.getTitle(242)), prediction)
+    
+    
+    
+''' ******* The End ****** '''
@@ -0,0 +1,45 @@
+'''
+Created on Oct 18, 2026
+
+Python version 2.7
+
+This file tests the Sweep class on the bundled data files.
+
+usage (from src): python -m unittest discover -s tests -t .
+'''
+
+from __future__ import division, print_function
+import unittest
+import classes.recommender
+import classes.sweep
+import classes.neighbourindex
+import functions.similarity
+
+
+
+''' Tests of Sweep on the bundled ratings '''
+class SweepTest(unittest.TestCase):
+    
+    '''test_itemIndexOncePerFold() method'''
+    def test_itemIndexOncePerFold(self):
+        ''' an item x item similarity builds its top-k table once per fold, every size'''
+        ''' is read off the same table'''
+        rec = classes.recommender.Recommender('../data/ratings.dat', '../data/movies.dat', backend='sparse')
+        build = classes.neighbourindex.NeighbourIndex.build
+        calls = []
+        def countingBuild(index, *args, **kwargs):
+            calls.append(index)
+            return build(index, *args, **kwargs)
+        classes.neighbourindex.NeighbourIndex.build = countingBuild
+        try:
+            table = classes.sweep.Sweep(rec, folds=2, seed=1).run(
+                sizes=(10, 50, 100), similarities=(functions.similarity.adjusted_cosine_matrix,),
+                formulas=('simple',))
+        finally:
+            classes.neighbourindex.NeighbourIndex.build = build
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(table), 3)
+    
+    
+    
+''' ******* The End ****** '''